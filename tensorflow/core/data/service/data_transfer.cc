@@ -16,6 +16,8 @@ limitations under the License.
 #include "tensorflow/core/data/service/data_transfer.h"
 
 #include <functional>
+#include <utility>
+#include <vector>
 
 #include "absl/strings/str_join.h"
 #include "tensorflow/core/platform/errors.h"
@@ -47,6 +49,17 @@ DataTransferClientFactories& transfer_client_factories() {
 }
 }  // namespace
 
+Status DataTransferClient::GetElements(const GetElementRequest& req,
+                                       int64 max_elements,
+                                       std::vector<GetElementResult>& results) {
+  // Another `GetElement` call would block until the next element is produced,
+  // so only fetch one.
+  GetElementResult result;
+  TF_RETURN_IF_ERROR(GetElement(req, result));
+  results.push_back(std::move(result));
+  return Status::OK();
+}
+
 void DataTransferServer::Register(
     std::string name,
     std::function<std::shared_ptr<DataTransferServer>(GetElementT)> factory) {
@@ -17,6 +17,7 @@ limitations under the License.
 #define TENSORFLOW_CORE_DATA_SERVICE_DATA_TRANSFER_H_
 
 #include <functional>
+#include <vector>
 
 #include "absl/strings/string_view.h"
 #include "absl/types/optional.h"
@@ -29,6 +30,11 @@ limitations under the License.
 namespace tensorflow {
 namespace data {
 
+// The largest number of elements returned by one `GetElements` call. Workers
+// buffer this many elements per first-come first-served task, so that a call
+// can find a full batch already produced.
+constexpr int64 kMaxGetElementsBatchSize = 16;
+
 // The result of a GetElement request. Exactly one of the following will be
 // true: (1) `components` is nonempty (2) `end_of_sequence` is true (3) `skip`
 // is true.
@@ -66,6 +72,18 @@ class DataTransferClient {
   virtual Status GetElement(const GetElementRequest& req,
                             GetElementResult& result) = 0;
 
+  // Fetches up to `max_elements` elements for `req`, appending them to
+  // `results`. Only waits for the first element; stops early when the next
+  // element is not immediately available, or after an end of sequence or a
+  // skip. If an error occurs after some elements were fetched, those elements
+  // are still appended to `results` before the error is returned. The default
+  // implementation fetches a single element with `GetElement`.
+  virtual Status GetElements(const GetElementRequest& req, int64 max_elements,
+                             std::vector<GetElementResult>& results);
+
+  // Returns whether `GetElements` may return more than one element per call.
+  virtual bool SupportsGetElements() const { return false; }
+
   // Makes a best effort to cancel all outstanding calls in progress for the
   // client, and causes further calls to return Cancelled status.
   virtual void TryCancel() = 0;
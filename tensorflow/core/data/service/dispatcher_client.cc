@@ -127,13 +127,14 @@ Status DataServiceDispatcherClient::GetSplit(int64 job_id, int64 repetition,
 
 Status DataServiceDispatcherClient::RegisterDataset(
     const DatasetDef& dataset, const absl::optional<std::string>& element_spec,
-    int64& dataset_id) {
+    DatasetCompression compression, int64& dataset_id) {
   TF_RETURN_IF_ERROR(EnsureInitialized());
   GetOrRegisterDatasetRequest req;
   *req.mutable_dataset() = dataset;
   if (element_spec.has_value()) {
     req.set_element_spec(element_spec.value());
   }
+  req.set_compression(compression);
 
   GetOrRegisterDatasetResponse resp;
   grpc::ClientContext client_ctx;
@@ -145,6 +146,40 @@ Status DataServiceDispatcherClient::RegisterDataset(
   return Status::OK();
 }
 
+Status DataServiceDispatcherClient::RegisterDatasets(
+    const std::vector<DatasetDef>& datasets,
+    const std::vector<absl::optional<std::string>>& element_specs,
+    const std::vector<DatasetCompression>& compressions,
+    std::vector<int64>& dataset_ids) {
+  if (datasets.size() != element_specs.size()) {
+    return errors::InvalidArgument("Got ", datasets.size(), " datasets but ",
+                                   element_specs.size(), " element specs");
+  }
+  if (datasets.size() != compressions.size()) {
+    return errors::InvalidArgument("Got ", datasets.size(), " datasets but ",
+                                   compressions.size(), " compressions");
+  }
+  TF_RETURN_IF_ERROR(EnsureInitialized());
+  GetOrRegisterDatasetsRequest req;
+  for (int i = 0; i < datasets.size(); ++i) {
+    GetOrRegisterDatasetRequest* dataset_req = req.add_requests();
+    *dataset_req->mutable_dataset() = datasets[i];
+    if (element_specs[i].has_value()) {
+      dataset_req->set_element_spec(element_specs[i].value());
+    }
+    dataset_req->set_compression(compressions[i]);
+  }
+
+  GetOrRegisterDatasetsResponse resp;
+  grpc::ClientContext client_ctx;
+  grpc::Status status = stub_->GetOrRegisterDatasets(&client_ctx, req, &resp);
+  if (!status.ok()) {
+    return grpc_util::WrapError("Failed to register datasets", status);
+  }
+  dataset_ids.assign(resp.dataset_ids().begin(), resp.dataset_ids().end());
+  return Status::OK();
+}
+
 Status DataServiceDispatcherClient::GetOrCreateJob(
     int64 dataset_id, ProcessingMode processing_mode,
     const absl::optional<JobKey>& job_key, absl::optional<int64> num_consumers,
@@ -250,6 +285,21 @@ Status DataServiceDispatcherClient::GetElementSpec(int64 dataset_id,
   return Status::OK();
 }
 
+Status DataServiceDispatcherClient::GetDatasetCompression(
+    int64 dataset_id, DatasetCompression& compression) {
+  TF_RETURN_IF_ERROR(EnsureInitialized());
+  GetDatasetCompressionRequest req;
+  req.set_dataset_id(dataset_id);
+  GetDatasetCompressionResponse resp;
+  grpc::ClientContext ctx;
+  grpc::Status s = stub_->GetDatasetCompression(&ctx, req, &resp);
+  if (!s.ok()) {
+    return grpc_util::WrapError("Failed to get dataset compression", s);
+  }
+  compression = resp.compression();
+  return Status::OK();
+}
+
 Status DataServiceDispatcherClient::EnsureInitialized() {
   mutex_lock l(mu_);
   if (stub_) {
@@ -66,10 +66,22 @@ class DataServiceDispatcherClient : public DataServiceClientBase {
                   Tensor& split, bool& end_of_splits);
 
   // Registers a dataset with the tf.data service, and stores the generated
-  // dataset id in `dataset_id`.
+  // dataset id in `dataset_id`. `compression` records how the dataset's
+  // elements are compressed, so that readers know whether to uncompress them.
   Status RegisterDataset(const DatasetDef& dataset,
                          const absl::optional<std::string>& element_spec,
-                         int64& dataset_id);
+                         DatasetCompression compression, int64& dataset_id);
+
+  // Registers multiple datasets with the tf.data service in a single request,
+  // and stores the generated dataset ids in `dataset_ids`. `element_specs` and
+  // `compressions` must have the same size as `datasets`. On failure, some of
+  // the datasets may already be registered; retrying returns their existing
+  // ids.
+  Status RegisterDatasets(
+      const std::vector<DatasetDef>& datasets,
+      const std::vector<absl::optional<std::string>>& element_specs,
+      const std::vector<DatasetCompression>& compressions,
+      std::vector<int64>& dataset_ids);
 
   // If `job_key` is set, looks up a job matching `job_key`. If `job_key` is
   // absent or no matching job is found, creates a new job. The resulting job
@@ -100,6 +112,10 @@ class DataServiceDispatcherClient : public DataServiceClientBase {
   // Returns element spec for the registered dataset.
   Status GetElementSpec(int64 dataset_id, std::string& element_spec);
 
+  // Returns how the registered dataset's elements are compressed.
+  Status GetDatasetCompression(int64 dataset_id,
+                               DatasetCompression& compression);
+
  protected:
   Status EnsureInitialized() override;
 
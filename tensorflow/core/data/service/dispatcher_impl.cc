@@ -434,7 +434,8 @@ Status DataServiceDispatcherImpl::GetOrRegisterDataset(
   }
 
   int64 id;
-  TF_RETURN_IF_ERROR(RegisterDataset(fingerprint, dataset_def, id));
+  TF_RETURN_IF_ERROR(
+      RegisterDataset(fingerprint, dataset_def, request->compression(), id));
   if (!request->element_spec().empty()) {
     TF_RETURN_IF_ERROR(SetElementSpec(id, request->element_spec()));
   }
@@ -444,15 +445,30 @@ Status DataServiceDispatcherImpl::GetOrRegisterDataset(
   return Status::OK();
 }
 
-Status DataServiceDispatcherImpl::RegisterDataset(uint64 fingerprint,
-                                                  const DatasetDef& dataset,
-                                                  int64& dataset_id)
+Status DataServiceDispatcherImpl::GetOrRegisterDatasets(
+    const GetOrRegisterDatasetsRequest* request,
+    GetOrRegisterDatasetsResponse* response) {
+  // Datasets registered before a failure are not rolled back. A retry reuses
+  // them, because GetOrRegisterDataset deduplicates by fingerprint.
+  for (const auto& dataset_request : request->requests()) {
+    GetOrRegisterDatasetResponse dataset_response;
+    TF_RETURN_IF_ERROR(
+        GetOrRegisterDataset(&dataset_request, &dataset_response));
+    response->add_dataset_ids(dataset_response.dataset_id());
+  }
+  return Status::OK();
+}
+
+Status DataServiceDispatcherImpl::RegisterDataset(
+    uint64 fingerprint, const DatasetDef& dataset,
+    DatasetCompression compression, int64& dataset_id)
     TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
   dataset_id = state_.NextAvailableDatasetId();
   Update update;
   RegisterDatasetUpdate* register_dataset = update.mutable_register_dataset();
   register_dataset->set_dataset_id(dataset_id);
   register_dataset->set_fingerprint(fingerprint);
+  register_dataset->set_compression(compression);
   TF_RETURN_IF_ERROR(
       dataset_store_->Put(DatasetKey(dataset_id, fingerprint), dataset));
   return Apply(update);
@@ -484,6 +500,17 @@ Status DataServiceDispatcherImpl::GetElementSpec(
   return Status::OK();
 }
 
+Status DataServiceDispatcherImpl::GetDatasetCompression(
+    const GetDatasetCompressionRequest* request,
+    GetDatasetCompressionResponse* response) {
+  TF_RETURN_IF_ERROR(CheckStarted());
+  mutex_lock l(mu_);
+  std::shared_ptr<const Dataset> dataset;
+  TF_RETURN_IF_ERROR(state_.DatasetFromId(request->dataset_id(), dataset));
+  response->set_compression(dataset->compression);
+  return Status::OK();
+}
+
 Status DataServiceDispatcherImpl::GetOrCreateJob(
     const GetOrCreateJobRequest* request, GetOrCreateJobResponse* response) {
   TF_RETURN_IF_ERROR(CheckStarted());
@@ -150,8 +150,12 @@ class DataServiceDispatcherImpl {
                     GetVersionResponse* response);
   Status GetOrRegisterDataset(const GetOrRegisterDatasetRequest* request,
                               GetOrRegisterDatasetResponse* response);
+  Status GetOrRegisterDatasets(const GetOrRegisterDatasetsRequest* request,
+                               GetOrRegisterDatasetsResponse* response);
   Status GetElementSpec(const GetElementSpecRequest* request,
                         GetElementSpecResponse* response);
+  Status GetDatasetCompression(const GetDatasetCompressionRequest* request,
+                               GetDatasetCompressionResponse* response);
   Status GetOrCreateJob(const GetOrCreateJobRequest* request,
                         GetOrCreateJobResponse* response);
   Status ReleaseJobClient(const ReleaseJobClientRequest* request,
@@ -176,10 +180,11 @@ class DataServiceDispatcherImpl {
       int64 dataset_id,
       std::vector<std::unique_ptr<SplitProvider>>& split_providers)
       TF_EXCLUSIVE_LOCKS_REQUIRED(mu_);
-  // Registers a dataset with the given fingerprint, storing the new dataset's
-  // id in `dataset_id`.
+  // Registers a dataset with the given fingerprint and compression, storing
+  // the new dataset's id in `dataset_id`.
   Status RegisterDataset(uint64 fingerprint, const DatasetDef& dataset,
-                         int64& dataset_id) TF_EXCLUSIVE_LOCKS_REQUIRED(mu_);
+                         DatasetCompression compression, int64& dataset_id)
+      TF_EXCLUSIVE_LOCKS_REQUIRED(mu_);
   // Sets the element spec of the dataset for the specified `dataset_id`.
   Status SetElementSpec(int64 dataset_id, const std::string& element_spec)
       TF_EXCLUSIVE_LOCKS_REQUIRED(mu_);
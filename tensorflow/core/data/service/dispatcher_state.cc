@@ -84,7 +84,8 @@ void DispatcherState::RegisterDataset(
     const RegisterDatasetUpdate& register_dataset) {
   int64 id = register_dataset.dataset_id();
   int64 fingerprint = register_dataset.fingerprint();
-  auto dataset = std::make_shared<Dataset>(id, fingerprint);
+  auto dataset = std::make_shared<Dataset>(id, fingerprint,
+                                           register_dataset.compression());
   DCHECK(!datasets_by_id_.contains(id));
   datasets_by_id_[id] = dataset;
   DCHECK(!datasets_by_fingerprint_.contains(fingerprint));
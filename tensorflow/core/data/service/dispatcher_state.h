@@ -69,11 +69,15 @@ class DispatcherState {
 
   // A dataset registered with the dispatcher.
   struct Dataset {
-    explicit Dataset(int64 dataset_id, int64 fingerprint)
-        : dataset_id(dataset_id), fingerprint(fingerprint) {}
+    explicit Dataset(int64 dataset_id, int64 fingerprint,
+                     DatasetCompression compression)
+        : dataset_id(dataset_id),
+          fingerprint(fingerprint),
+          compression(compression) {}
 
     const int64 dataset_id;
     const int64 fingerprint;
+    const DatasetCompression compression;
   };
 
   // A worker registered with the dispatcher.
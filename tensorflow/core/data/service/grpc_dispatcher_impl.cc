@@ -46,12 +46,14 @@ HANDLER(GetDatasetDef);
 HANDLER(GetSplit);
 HANDLER(GetVersion);
 HANDLER(GetOrRegisterDataset);
+HANDLER(GetOrRegisterDatasets);
 HANDLER(ReleaseJobClient);
 HANDLER(MaybeRemoveTask);
 HANDLER(GetOrCreateJob);
 HANDLER(ClientHeartbeat);
 HANDLER(GetWorkers);
 HANDLER(GetElementSpec);
+HANDLER(GetDatasetCompression);
 #undef HANDLER
 
 }  // namespace data
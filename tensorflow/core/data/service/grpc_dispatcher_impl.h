@@ -45,12 +45,14 @@ class GrpcDispatcherImpl : public DispatcherService::Service {
   HANDLER(GetSplit);
   HANDLER(GetVersion);
   HANDLER(GetOrRegisterDataset);
+  HANDLER(GetOrRegisterDatasets);
   HANDLER(ReleaseJobClient);
   HANDLER(MaybeRemoveTask);
   HANDLER(GetOrCreateJob);
   HANDLER(ClientHeartbeat);
   HANDLER(GetWorkers);
   HANDLER(GetElementSpec);
+  HANDLER(GetDatasetCompression);
 #undef HANDLER
 
  private:
@@ -18,6 +18,7 @@ limitations under the License.
 #include <memory>
 #include <string>
 #include <utility>
+#include <vector>
 
 #include "grpcpp/channel.h"
 #include "grpcpp/client_context.h"
@@ -83,11 +84,13 @@ class GrpcDispatcherImplTest : public ::testing::Test {
     return absl::StrCat(kHostAddress, ":", dispatcher_server_->BoundPort());
   }
 
-  StatusOr<GetOrRegisterDatasetResponse> RegisterDataset() {
+  StatusOr<GetOrRegisterDatasetResponse> RegisterDataset(
+      DatasetCompression compression = COMPRESSION_UNSPECIFIED) {
     GetOrRegisterDatasetRequest request;
     GetOrRegisterDatasetResponse response;
     TF_ASSIGN_OR_RETURN(*request.mutable_dataset(),
                         RangeSquareDataset(/*range=*/10));
+    request.set_compression(compression);
     ClientContext context;
     TF_RETURN_IF_ERROR(
         FromGrpcStatus(dispatcher_client_stub_->GetOrRegisterDataset(
@@ -95,6 +98,33 @@ class GrpcDispatcherImplTest : public ::testing::Test {
     return response;
   }
 
+  StatusOr<GetOrRegisterDatasetsResponse> RegisterDatasets(
+      const std::vector<int64>& ranges) {
+    GetOrRegisterDatasetsRequest request;
+    GetOrRegisterDatasetsResponse response;
+    for (int64 range : ranges) {
+      TF_ASSIGN_OR_RETURN(*request.add_requests()->mutable_dataset(),
+                          RangeSquareDataset(range));
+    }
+    ClientContext context;
+    TF_RETURN_IF_ERROR(
+        FromGrpcStatus(dispatcher_client_stub_->GetOrRegisterDatasets(
+            &context, request, &response)));
+    return response;
+  }
+
+  StatusOr<GetDatasetCompressionResponse> GetDatasetCompression(
+      const int64 dataset_id) {
+    GetDatasetCompressionRequest request;
+    GetDatasetCompressionResponse response;
+    request.set_dataset_id(dataset_id);
+    ClientContext context;
+    TF_RETURN_IF_ERROR(
+        FromGrpcStatus(dispatcher_client_stub_->GetDatasetCompression(
+            &context, request, &response)));
+    return response;
+  }
+
   StatusOr<GetOrCreateJobResponse> CreateJob(const int64 dataset_id) {
     GetOrCreateJobRequest request;
     GetOrCreateJobResponse response;
@@ -154,6 +184,29 @@ TEST_F(GrpcDispatcherImplTest, ClientHeartbeat) {
   EXPECT_EQ(client_response.task_info(0).worker_address(), kHostAddress);
 }
 
+TEST_F(GrpcDispatcherImplTest, RegisterDatasets) {
+  TF_ASSERT_OK_AND_ASSIGN(GetOrRegisterDatasetsResponse response,
+                          RegisterDatasets({10, 20, 10}));
+  ASSERT_EQ(response.dataset_ids().size(), 3);
+  EXPECT_NE(response.dataset_ids(0), response.dataset_ids(1));
+  // Registering the same dataset again returns the existing id.
+  EXPECT_EQ(response.dataset_ids(0), response.dataset_ids(2));
+}
+
+TEST_F(GrpcDispatcherImplTest, GetDatasetCompression) {
+  TF_ASSERT_OK_AND_ASSIGN(GetOrRegisterDatasetResponse dataset_response,
+                          RegisterDataset(COMPRESSION_NONE));
+  TF_ASSERT_OK_AND_ASSIGN(
+      GetDatasetCompressionResponse compression_response,
+      GetDatasetCompression(dataset_response.dataset_id()));
+  EXPECT_EQ(compression_response.compression(), COMPRESSION_NONE);
+}
+
+TEST_F(GrpcDispatcherImplTest, GetDatasetCompressionNotRegistered) {
+  EXPECT_TRUE(errors::IsNotFound(
+      GetDatasetCompression(/*dataset_id=*/0).status()));
+}
+
 }  // namespace
 }  // namespace data
 }  // namespace tensorflow
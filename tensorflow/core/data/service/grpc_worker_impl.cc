@@ -22,7 +22,9 @@ limitations under the License.
 #include "grpcpp/server_context.h"
 #include "tensorflow/core/data/service/worker_impl.h"
 #include "tensorflow/core/distributed_runtime/rpc/grpc_util.h"
+#include "tensorflow/core/lib/gtl/cleanup.h"
 #include "tensorflow/core/platform/errors.h"
+#include "tensorflow/core/platform/mutex.h"
 #include "tensorflow/core/platform/status.h"
 #include "tensorflow/core/protobuf/service_config.pb.h"
 
@@ -49,6 +51,13 @@ Status GrpcWorkerImpl::Start(const std::string& worker_address,
 
 void GrpcWorkerImpl::Stop() {
   LocalWorkers::Remove(worker_address_);
+  {
+    mutex_lock l(mu_);
+    stopped_ = true;
+    for (ServerContext* context : stream_contexts_) {
+      context->TryCancel();
+    }
+  }
   impl_->Stop();
 }
 
@@ -60,8 +69,40 @@ void GrpcWorkerImpl::Stop() {
   }
 HANDLER(ProcessTask);
 HANDLER(GetElement);
+HANDLER(GetElements);
 HANDLER(GetWorkerTasks);
 #undef HANDLER
 
+::grpc::Status GrpcWorkerImpl::GetElementStream(
+    ServerContext* context,
+    ::grpc::ServerReaderWriter<GetElementResponse, GetElementRequest>* stream) {
+  {
+    mutex_lock l(mu_);
+    if (stopped_) {
+      return ToGrpcStatus(errors::Cancelled("Worker is shutting down"));
+    }
+    stream_contexts_.insert(context);
+  }
+  auto cleanup = gtl::MakeCleanup([this, context] {
+    mutex_lock l(mu_);
+    stream_contexts_.erase(context);
+  });
+  GetElementRequest request;
+  while (!context->IsCancelled() && stream->Read(&request)) {
+    GetElementResponse response;
+    Status s = impl_->GetElement(&request, &response);
+    if (!s.ok()) {
+      // Ending the stream with an error lets the client retry on a new stream.
+      return ToGrpcStatus(s);
+    }
+    if (!stream->Write(response)) {
+      VLOG(1) << "Failed to write GetElement response for task "
+              << request.task_id() << "; the client has closed the stream.";
+      break;
+    }
+  }
+  return ::grpc::Status::OK;
+}
+
 }  // namespace data
 }  // namespace tensorflow
@@ -19,10 +19,14 @@ limitations under the License.
 #include <memory>
 #include <string>
 
+#include "absl/container/flat_hash_set.h"
 #include "grpcpp/server_builder.h"
+#include "grpcpp/server_context.h"
+#include "grpcpp/support/sync_stream.h"
 #include "tensorflow/core/data/service/worker.grpc.pb.h"
 #include "tensorflow/core/data/service/worker.pb.h"
 #include "tensorflow/core/data/service/worker_impl.h"
+#include "tensorflow/core/platform/mutex.h"
 #include "tensorflow/core/platform/status.h"
 #include "tensorflow/core/protobuf/service_config.pb.h"
 
@@ -55,15 +59,28 @@ class GrpcWorkerImpl : public WorkerService::Service {
                         method##Response* response) override;
   HANDLER(ProcessTask);
   HANDLER(GetElement);
+  HANDLER(GetElements);
   HANDLER(GetWorkerTasks);
 #undef HANDLER
 
+  ::grpc::Status GetElementStream(
+      ::grpc::ServerContext* context,
+      ::grpc::ServerReaderWriter<GetElementResponse, GetElementRequest>* stream)
+      override;
+
  private:
   std::string worker_address_;
   // A std::shared_ptr allows clients to access local servers and directly call
   // the servers' methods to avoid RPC calls and data copy.
   std::shared_ptr<DataServiceWorkerImpl> impl_;
 
+  mutex mu_;
+  bool stopped_ TF_GUARDED_BY(mu_) = false;
+  // Contexts of the open `GetElementStream` calls. Idle streams block in
+  // `Read()`, so `Stop()` cancels them to let their handlers return.
+  absl::flat_hash_set<::grpc::ServerContext*> stream_contexts_
+      TF_GUARDED_BY(mu_);
+
   TF_DISALLOW_COPY_AND_ASSIGN(GrpcWorkerImpl);
 };
 
@@ -15,6 +15,8 @@ limitations under the License.
 
 #include "tensorflow/core/data/service/server_lib.h"
 
+#include <chrono>  // NOLINT(build/c++11)
+
 #include "tensorflow/core/data/service/credentials_factory.h"
 #include "tensorflow/core/data/service/grpc_dispatcher_impl.h"
 #include "tensorflow/core/data/service/grpc_util.h"
@@ -26,6 +28,8 @@ namespace data {
 
 namespace {
 constexpr char kPortPlaceholder[] = "%port%";
+// How long `Stop` waits for outstanding requests before cancelling them.
+constexpr int64 kShutdownDeadlineSeconds = 5;
 }
 
 GrpcDataServerBase::GrpcDataServerBase(int port, const std::string& protocol,
@@ -72,7 +76,8 @@ void GrpcDataServerBase::Stop() {
   }
   if (server_) {
     StopServiceInternal();
-    server_->Shutdown();
+    server_->Shutdown(std::chrono::system_clock::now() +
+                      std::chrono::seconds(kShutdownDeadlineSeconds));
     LOG(INFO) << "Shut down " << server_type_ << " server running at port "
               << BoundPort();
   }
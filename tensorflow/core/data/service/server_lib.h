@@ -44,7 +44,8 @@ class GrpcDataServerBase {
   // Starts the server running asynchronously.
   Status Start();
 
-  // Stops the server. This will block until all outstanding requests complete.
+  // Stops the server. This will block until all outstanding requests complete,
+  // or until a shutdown deadline after which they are cancelled.
   void Stop();
 
   // Blocks until the server stops.
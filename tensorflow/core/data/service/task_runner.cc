@@ -17,6 +17,7 @@ limitations under the License.
 #include <memory>
 #include <vector>
 
+#include "absl/types/optional.h"
 #include "tensorflow/core/data/service/thread_safe_buffer.h"
 #include "tensorflow/core/data/standalone.h"
 #include "tensorflow/core/framework/cancellation.h"
@@ -79,7 +80,8 @@ Status TaskRunner::Create(const experimental::WorkerConfig& worker_config,
 
 FirstComeFirstServedTaskRunner::FirstComeFirstServedTaskRunner(
     std::unique_ptr<TaskIterator> iterator)
-    : iterator_(std::move(iterator)), buffer_(/*buffer_size=*/1) {
+    : iterator_(std::move(iterator)),
+      buffer_(/*buffer_size=*/kMaxGetElementsBatchSize) {
   RunPrefetchThread();
 }
 
@@ -91,6 +93,17 @@ Status FirstComeFirstServedTaskRunner::GetNext(const GetElementRequest& req,
   return Status::OK();
 }
 
+Status FirstComeFirstServedTaskRunner::TryGetNext(const GetElementRequest& req,
+                                                  GetElementResult& result,
+                                                  bool& ready) {
+  absl::optional<StatusOr<GetElementResult>> next = buffer_.TryPop();
+  ready = next.has_value();
+  if (ready) {
+    TF_ASSIGN_OR_RETURN(result, std::move(*next));
+  }
+  return Status::OK();
+}
+
 Status FirstComeFirstServedTaskRunner::PrefetchFn() {
   while (true) {
     TF_RETURN_IF_ERROR(buffer_.Push(GetNextFromInputIterator()));
@@ -261,6 +274,15 @@ Status RoundRobinTaskRunner::GetNext(const GetElementRequest& req,
   return Status::OK();
 }
 
+Status RoundRobinTaskRunner::TryGetNext(const GetElementRequest& req,
+                                        GetElementResult& result,
+                                        bool& ready) {
+  // Round-robin consumers read one element per round and have to wait for
+  // their round to start, so there are no elements to take without waiting.
+  ready = false;
+  return Status::OK();
+}
+
 void RoundRobinTaskRunner::Cancel() {
   mutex_lock l(mu_);
   cancelled_ = true;
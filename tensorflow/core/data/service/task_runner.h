@@ -74,12 +74,18 @@ class TaskRunner {
   // Gets the next element for the given request.
   virtual Status GetNext(const GetElementRequest& req,
                          GetElementResult& result) = 0;
+  // Like `GetNext`, but does not wait for the next element to be produced. If
+  // no element is ready, returns OK and sets `ready` to false.
+  virtual Status TryGetNext(const GetElementRequest& req,
+                            GetElementResult& result, bool& ready) = 0;
   // Cancels in-progress `GetNext` requests.
   virtual void Cancel() = 0;
 };
 
 // A task runner which provides elements on a first-come first-served basis.
-// It does not consider which consumer is making the request.
+// It does not consider which consumer is making the request. Up to
+// `kMaxGetElementsBatchSize` elements are produced ahead of requests, so that a
+// `GetElements` call can return a full batch.
 class FirstComeFirstServedTaskRunner : public TaskRunner {
  public:
   explicit FirstComeFirstServedTaskRunner(
@@ -88,6 +94,8 @@ class FirstComeFirstServedTaskRunner : public TaskRunner {
 
   Status GetNext(const GetElementRequest& req,
                  GetElementResult& result) override;
+  Status TryGetNext(const GetElementRequest& req, GetElementResult& result,
+                    bool& ready) override;
   void Cancel() override;
 
  private:
@@ -180,6 +188,8 @@ class RoundRobinTaskRunner : public TaskRunner {
 
   Status GetNext(const GetElementRequest& req,
                  GetElementResult& result) override;
+  Status TryGetNext(const GetElementRequest& req, GetElementResult& result,
+                    bool& ready) override;
   void Cancel() override;
 
  private:
@@ -20,9 +20,12 @@ limitations under the License.
 
 #include "tensorflow/core/data/dataset_test_base.h"
 #include "tensorflow/core/data/service/common.pb.h"
+#include "tensorflow/core/framework/attr_value_util.h"
+#include "tensorflow/core/framework/function.pb.h"
 #include "tensorflow/core/framework/graph.pb.h"
 #include "tensorflow/core/framework/node_def.pb.h"
 #include "tensorflow/core/framework/tensor.h"
+#include "tensorflow/core/framework/types.pb.h"
 #include "tensorflow/core/platform/env.h"
 #include "tensorflow/core/platform/path.h"
 #include "tensorflow/core/platform/statusor.h"
@@ -59,6 +62,46 @@ StatusOr<DatasetDef> RangeSquareDataset(const int64 range) {
   return dataset_def;
 }
 
+StatusOr<DatasetDef> RangeSquareDatasetWithError(const int64 range,
+                                                 const int64 error_index) {
+  TF_ASSIGN_OR_RETURN(DatasetDef dataset_def, RangeSquareDataset(range));
+  // Adds `Assert(args_0 != error_index)` to the map function, as a control
+  // dependency of its output.
+  FunctionDef& map_fn =
+      *dataset_def.mutable_graph()->mutable_library()->mutable_function(0);
+  NodeDef& error_index_node = *map_fn.add_node_def();
+  error_index_node.set_name("error_index");
+  error_index_node.set_op("Const");
+  SetAttrValue(DT_INT64, &(*error_index_node.mutable_attr())["dtype"]);
+  SetAttrValue(Tensor(error_index),
+               &(*error_index_node.mutable_attr())["value"]);
+
+  NodeDef& not_equal_node = *map_fn.add_node_def();
+  not_equal_node.set_name("not_equal");
+  not_equal_node.set_op("NotEqual");
+  not_equal_node.add_input("args_0");
+  not_equal_node.add_input("error_index:output:0");
+  SetAttrValue(DT_INT64, &(*not_equal_node.mutable_attr())["T"]);
+  SetAttrValue(true,
+               &(*not_equal_node.mutable_attr())["incompatible_shape_error"]);
+
+  NodeDef& assert_node = *map_fn.add_node_def();
+  assert_node.set_name("assert");
+  assert_node.set_op("Assert");
+  assert_node.add_input("not_equal:z:0");
+  assert_node.add_input("args_0");
+  SetAttrValue(std::vector<DataType>{DT_INT64},
+               &(*assert_node.mutable_attr())["T"]);
+  SetAttrValue(3, &(*assert_node.mutable_attr())["summarize"]);
+
+  for (NodeDef& node : *map_fn.mutable_node_def()) {
+    if (node.name() == "Identity") {
+      node.add_input("^assert");
+    }
+  }
+  return dataset_def;
+}
+
 }  // namespace testing
 }  // namespace data
 }  // namespace tensorflow
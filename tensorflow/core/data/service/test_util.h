@@ -30,6 +30,11 @@ namespace testing {
 // graph execution.
 StatusOr<DatasetDef> RangeSquareDataset(int64 range);
 
+// Returns a test dataset like `RangeSquareDataset(range)`, except that
+// producing the element at `error_index` fails with an InvalidArgument error.
+StatusOr<DatasetDef> RangeSquareDatasetWithError(int64 range,
+                                                 int64 error_index);
+
 }  // namespace testing
 }  // namespace data
 }  // namespace tensorflow
@@ -27,6 +27,8 @@ limitations under the License.
 #include "tensorflow/core/platform/status_matchers.h"
 #include "tensorflow/core/platform/statusor.h"
 #include "tensorflow/core/platform/test.h"
+#include "tensorflow/core/platform/types.h"
+#include "tensorflow/core/protobuf/error_codes.pb.h"
 
 namespace tensorflow {
 namespace data {
@@ -34,6 +36,7 @@ namespace testing {
 namespace {
 
 using ::tensorflow::testing::IsOkAndHolds;
+using ::tensorflow::testing::StatusIs;
 using ::testing::IsEmpty;
 
 StatusOr<std::vector<std::vector<Tensor>>> GetIteratorOutput(
@@ -80,6 +83,29 @@ TEST(TestUtilTest, EmptyDataset) {
   EXPECT_THAT(GetIteratorOutput(*iterator), IsOkAndHolds(IsEmpty()));
 }
 
+TEST(TestUtilTest, RangeSquareDatasetWithError) {
+  TF_ASSERT_OK_AND_ASSIGN(
+      const DatasetDef dataset_def,
+      RangeSquareDatasetWithError(/*range=*/10, /*error_index=*/2));
+  standalone::Dataset::Params params;
+  std::unique_ptr<standalone::Dataset> dataset;
+  TF_ASSERT_OK(
+      standalone::Dataset::FromGraph(params, dataset_def.graph(), &dataset));
+  std::unique_ptr<standalone::Iterator> iterator;
+  TF_ASSERT_OK(dataset->MakeIterator(&iterator));
+  for (int64 i = 0; i < 2; ++i) {
+    std::vector<Tensor> outputs;
+    bool end_of_input = false;
+    TF_ASSERT_OK(iterator->GetNext(&outputs, &end_of_input));
+    ASSERT_FALSE(end_of_input);
+    test::ExpectEqual(outputs[0], Tensor(int64{i * i}));
+  }
+  std::vector<Tensor> outputs;
+  bool end_of_input = false;
+  EXPECT_THAT(iterator->GetNext(&outputs, &end_of_input),
+              StatusIs(error::INVALID_ARGUMENT));
+}
+
 }  // namespace
 }  // namespace testing
 }  // namespace data
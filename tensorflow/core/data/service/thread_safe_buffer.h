@@ -17,6 +17,7 @@ limitations under the License.
 
 #include <deque>
 
+#include "absl/types/optional.h"
 #include "tensorflow/core/platform/macros.h"
 #include "tensorflow/core/platform/mutex.h"
 #include "tensorflow/core/platform/status.h"
@@ -37,6 +38,10 @@ class ThreadSafeBuffer final {
   // a non-OK status was pushed or the buffer has been cancelled.
   StatusOr<T> Pop();
 
+  // Like `Pop`, but returns an empty optional instead of blocking if the
+  // buffer is empty.
+  absl::optional<StatusOr<T>> TryPop();
+
   // Writes the next element. Blocks if the buffer is full. Returns an error if
   // the buffer has been cancelled.
   Status Push(StatusOr<T> value);
@@ -81,6 +86,21 @@ StatusOr<T> ThreadSafeBuffer<T>::Pop() {
   return result;
 }
 
+template <class T>
+absl::optional<StatusOr<T>> ThreadSafeBuffer<T>::TryPop() {
+  mutex_lock l(mu_);
+  if (!status_.ok()) {
+    return StatusOr<T>(status_);
+  }
+  if (results_.empty()) {
+    return absl::nullopt;
+  }
+  StatusOr<T> result = std::move(results_.front());
+  results_.pop_front();
+  ready_to_push_.notify_one();
+  return result;
+}
+
 template <class T>
 Status ThreadSafeBuffer<T>::Push(StatusOr<T> value) {
   mutex_lock l(mu_);
@@ -19,6 +19,7 @@ limitations under the License.
 #include <vector>
 
 #include "absl/strings/str_cat.h"
+#include "absl/types/optional.h"
 #include "tensorflow/core/framework/tensor.h"
 #include "tensorflow/core/framework/tensor_testutil.h"
 #include "tensorflow/core/lib/core/status_test_util.h"
@@ -158,6 +159,23 @@ TEST_P(ThreadSafeBufferTest, BlockReaderWhenBufferIsEmpty) {
   ASSERT_THAT(buffer.Push(Tensor("Test tensor")), IsOk());
 }
 
+TEST_P(ThreadSafeBufferTest, TryPopDoesNotBlock) {
+  ThreadSafeBuffer<int> buffer(GetBufferSize());
+  EXPECT_FALSE(buffer.TryPop().has_value());
+
+  ASSERT_THAT(buffer.Push(1), IsOk());
+  absl::optional<StatusOr<int>> next = buffer.TryPop();
+  ASSERT_TRUE(next.has_value());
+  TF_ASSERT_OK_AND_ASSIGN(int value, *next);
+  EXPECT_EQ(value, 1);
+  EXPECT_FALSE(buffer.TryPop().has_value());
+
+  buffer.Cancel(errors::Aborted("Aborted"));
+  next = buffer.TryPop();
+  ASSERT_TRUE(next.has_value());
+  EXPECT_THAT(*next, StatusIs(error::ABORTED));
+}
+
 TEST_P(ThreadSafeBufferTest, BlockWriterWhenBufferIsFull) {
   ThreadSafeBuffer<Tensor> buffer(GetBufferSize());
   // Fills the buffer to block the next `Push` call.
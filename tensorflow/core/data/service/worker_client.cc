@@ -14,6 +14,7 @@ limitations under the License.
 ==============================================================================*/
 #include "tensorflow/core/data/service/worker_client.h"
 
+#include <atomic>
 #include <memory>
 #include <string>
 #include <utility>
@@ -24,6 +25,7 @@ limitations under the License.
 #include "grpcpp/security/credentials.h"
 #include "grpcpp/support/channel_arguments.h"
 #include "grpcpp/support/status.h"
+#include "grpcpp/support/sync_stream.h"
 #include "absl/container/flat_hash_set.h"
 #include "absl/memory/memory.h"
 #include "absl/strings/string_view.h"
@@ -46,16 +48,56 @@ limitations under the License.
 #include "tensorflow/core/platform/statusor.h"
 #include "tensorflow/core/platform/thread_annotations.h"
 #include "tensorflow/core/platform/types.h"
+#include "tensorflow/core/protobuf/error_codes.pb.h"
 
 namespace tensorflow {
 namespace data {
 
+namespace {
+// Converts a GetElement response received from a worker into a
+// `GetElementResult`.
+Status ResponseToResult(GetElementResponse& resp, GetElementResult& result) {
+  result.end_of_sequence = resp.end_of_sequence();
+  result.skip = resp.skip_task();
+  switch (resp.element_case()) {
+    case GetElementResponse::kCompressed: {
+      Tensor tensor(DT_VARIANT, TensorShape{});
+      tensor.scalar<Variant>()() = std::move(*resp.mutable_compressed());
+      result.components.push_back(tensor);
+      break;
+    }
+    case GetElementResponse::kUncompressed:
+      for (const auto& component : resp.uncompressed().components()) {
+        result.components.emplace_back();
+        if (!result.components.back().FromProto(component)) {
+          return errors::Internal("Failed to parse tensor.");
+        }
+      }
+      break;
+    case GetElementResponse::ELEMENT_NOT_SET:
+      break;
+  }
+  return Status::OK();
+}
+}  // namespace
+
 Status DataServiceWorkerClient::GetElement(const GetElementRequest& req,
                                            GetElementResult& result) {
   TF_RETURN_IF_ERROR(EnsureInitialized());
   return client_->GetElement(req, result);
 }
 
+Status DataServiceWorkerClient::GetElements(
+    const GetElementRequest& req, int64 max_elements,
+    std::vector<GetElementResult>& results) {
+  TF_RETURN_IF_ERROR(EnsureInitialized());
+  return client_->GetElements(req, max_elements, results);
+}
+
+bool DataServiceWorkerClient::SupportsGetElements() {
+  return EnsureInitialized().ok() && client_->SupportsGetElements();
+}
+
 Status DataServiceWorkerClient::EnsureInitialized() {
   mutex_lock l(mu_);
   if (client_) {
@@ -106,36 +148,71 @@ class GrpcDataTransferClient : public DataTransferClient {
     }
     GetElementResponse resp;
     grpc::Status s = stub_->GetElement(&ctx, req, &resp);
-    result.end_of_sequence = resp.end_of_sequence();
-    result.skip = resp.skip_task();
-    switch (resp.element_case()) {
-      case GetElementResponse::kCompressed: {
-        Tensor tensor(DT_VARIANT, TensorShape{});
-        tensor.scalar<Variant>()() = std::move(resp.compressed());
-        result.components.push_back(tensor);
-        break;
+    Status status = ResponseToResult(resp, result);
+    {
+      mutex_lock l(mu_);
+      active_contexts_.erase(&ctx);
+    }
+    if (!s.ok()) {
+      return grpc_util::WrapError("Failed to get element", s);
+    }
+    return status;
+  }
+
+  Status GetElements(const GetElementRequest& req, int64 max_elements,
+                     std::vector<GetElementResult>& results) override {
+    if (max_elements <= 1 || !SupportsGetElements()) {
+      return DataTransferClient::GetElements(req, /*max_elements=*/1,
+                                             results);
+    }
+    VLOG(3) << "GetElements for task " << req.task_id() << " from gRPC worker "
+            << "server.";
+    {
+      mutex_lock l(mu_);
+      if (cancelled_) {
+        return errors::Cancelled("Client was cancelled.");
       }
-      case GetElementResponse::kUncompressed:
-        for (const auto& component : resp.uncompressed().components()) {
-          result.components.emplace_back();
-          if (!result.components.back().FromProto(component)) {
-            return errors::Internal("Failed to parse tensor.");
-          }
-        }
-        break;
-      case GetElementResponse::ELEMENT_NOT_SET:
-        break;
     }
+    grpc::ClientContext ctx;
+    {
+      mutex_lock l(mu_);
+      active_contexts_.insert(&ctx);
+    }
+    GetElementsRequest bulk_req;
+    *bulk_req.mutable_request() = req;
+    bulk_req.set_max_elements(max_elements);
+    GetElementsResponse resp;
+    grpc::Status s = stub_->GetElements(&ctx, bulk_req, &resp);
     {
       mutex_lock l(mu_);
       active_contexts_.erase(&ctx);
     }
+    if (s.error_code() == grpc::StatusCode::UNIMPLEMENTED) {
+      // The worker predates GetElements, so fall back to one element per call.
+      VLOG(1) << "Worker does not support GetElements; falling back to "
+              << "GetElement.";
+      get_elements_supported_ = false;
+      return DataTransferClient::GetElements(req, /*max_elements=*/1,
+                                             results);
+    }
     if (!s.ok()) {
-      return grpc_util::WrapError("Failed to get element", s);
+      return grpc_util::WrapError("Failed to get elements", s);
+    }
+    for (auto& element : *resp.mutable_elements()) {
+      GetElementResult result;
+      TF_RETURN_IF_ERROR(ResponseToResult(element, result));
+      results.push_back(std::move(result));
+    }
+    if (resp.status_code() != error::OK) {
+      return Status(resp.status_code(), resp.status_error_message());
     }
     return Status::OK();
   }
 
+  bool SupportsGetElements() const override {
+    return get_elements_supported_.load();
+  }
+
   void TryCancel() override {
     VLOG(2) << "Cancel GrpcDataTransferClient.";
     mutex_lock l(mu_);
@@ -155,6 +232,9 @@ class GrpcDataTransferClient : public DataTransferClient {
   // Indicates that the client has been cancelled, so no further requests should
   // be accepted.
   bool cancelled_ TF_GUARDED_BY(mu_) = false;
+  // Whether the worker serves GetElements. Cleared when talking to a worker
+  // from before GetElements was added.
+  std::atomic<bool> get_elements_supported_{true};
 };
 
 class GrpcTransferClientRegistrar {
@@ -174,6 +254,114 @@ class GrpcTransferClientRegistrar {
 };
 static GrpcTransferClientRegistrar gprc_client_registrar;
 
+class GrpcStreamDataTransferClient : public DataTransferClient {
+ public:
+  GrpcStreamDataTransferClient(
+      std::shared_ptr<grpc::ChannelCredentials> credentials,
+      std::string address) {
+    VLOG(2) << "Create GrpcStreamDataTransferClient for worker " << address
+            << ".";
+    grpc::ChannelArguments args;
+    args.SetMaxReceiveMessageSize(-1);
+    auto channel = grpc::CreateCustomChannel(address, credentials, args);
+    stub_ = WorkerService::NewStub(channel);
+  }
+
+  ~GrpcStreamDataTransferClient() override {
+    TryCancel();
+    mutex_lock l(stream_mu_);
+    if (stream_) {
+      stream_->Finish().IgnoreError();
+    }
+  }
+
+  Status GetElement(const GetElementRequest& req,
+                    GetElementResult& result) override {
+    VLOG(3) << "GetElement for task " << req.task_id() << " from gRPC worker "
+            << "server over a stream.";
+    // Requests on the stream are answered in order, so only one request may be
+    // in flight at a time.
+    mutex_lock l(stream_mu_);
+    TF_RETURN_IF_ERROR(EnsureStreamStarted());
+    GetElementResponse resp;
+    if (!stream_->Write(req) || !stream_->Read(&resp)) {
+      return FinishStream();
+    }
+    return ResponseToResult(resp, result);
+  }
+
+  void TryCancel() override {
+    VLOG(2) << "Cancel GrpcStreamDataTransferClient.";
+    mutex_lock l(mu_);
+    cancelled_ = true;
+    if (ctx_) {
+      ctx_->TryCancel();
+    }
+  }
+
+ private:
+  // Opens a new stream to the worker if there is no open stream.
+  Status EnsureStreamStarted() TF_EXCLUSIVE_LOCKS_REQUIRED(stream_mu_) {
+    mutex_lock l(mu_);
+    if (cancelled_) {
+      return errors::Cancelled("Client was cancelled.");
+    }
+    if (!stream_) {
+      ctx_ = absl::make_unique<grpc::ClientContext>();
+      stream_ = stub_->GetElementStream(ctx_.get());
+    }
+    return Status::OK();
+  }
+
+  // Closes the current stream after it has been broken, returning the error
+  // which ended it. The next request will open a new stream.
+  Status FinishStream() TF_EXCLUSIVE_LOCKS_REQUIRED(stream_mu_) {
+    grpc::Status s = stream_->Finish();
+    stream_.reset();
+    {
+      mutex_lock l(mu_);
+      ctx_.reset();
+    }
+    if (s.ok()) {
+      return errors::Unavailable(
+          "Failed to get element: the worker closed the element stream.");
+    }
+    return grpc_util::WrapError("Failed to get element", s);
+  }
+
+  std::unique_ptr<WorkerService::Stub> stub_;
+  // Serializes use of `stream_`.
+  mutex stream_mu_;
+  std::unique_ptr<
+      grpc::ClientReaderWriter<GetElementRequest, GetElementResponse>>
+      stream_ TF_GUARDED_BY(stream_mu_);
+  mutex mu_;
+  // Context of the current stream. Guarded separately from `stream_` so that
+  // `TryCancel` can cancel a call blocked reading from the stream.
+  std::unique_ptr<grpc::ClientContext> ctx_ TF_GUARDED_BY(mu_);
+  // Indicates that the client has been cancelled, so no further requests should
+  // be accepted.
+  bool cancelled_ TF_GUARDED_BY(mu_) = false;
+};
+
+class GrpcStreamTransferClientRegistrar {
+ public:
+  GrpcStreamTransferClientRegistrar() {
+    DataTransferClient::Register(
+        kGrpcStreamTransferProtocol,
+        [](DataTransferClient::Config config,
+           std::unique_ptr<DataTransferClient>* out) {
+          std::shared_ptr<grpc::ChannelCredentials> credentials;
+          TF_RETURN_IF_ERROR(CredentialsFactory::CreateClientCredentials(
+              config.protocol, &credentials));
+          *out = std::make_unique<GrpcStreamDataTransferClient>(credentials,
+                                                                config.address);
+          return Status::OK();
+        });
+  }
+};
+static GrpcStreamTransferClientRegistrar grpc_stream_client_registrar;
+
 class LocalDataTransferClient : public DataTransferClient {
  public:
   explicit LocalDataTransferClient(absl::string_view worker_address)
@@ -31,6 +31,7 @@ namespace data {
 
 constexpr const char kLocalTransferProtocol[] = "local";
 constexpr const char kGrpcTransferProtocol[] = "grpc";
+constexpr const char kGrpcStreamTransferProtocol[] = "grpc+stream";
 
 // Client for communicating with the tf.data service worker.
 class DataServiceWorkerClient : public DataServiceClientBase {
@@ -44,6 +45,15 @@ class DataServiceWorkerClient : public DataServiceClientBase {
   // Fetches an element from the worker.
   Status GetElement(const GetElementRequest& req, GetElementResult& result);
 
+  // Fetches up to `max_elements` elements from the worker, appending them to
+  // `results`. See `DataTransferClient::GetElements`.
+  Status GetElements(const GetElementRequest& req, int64 max_elements,
+                     std::vector<GetElementResult>& results);
+
+  // Returns whether `GetElements` may return more than one element per call
+  // with the client's transfer protocol.
+  bool SupportsGetElements();
+
   // Makes a best effort to cancel all outstanding calls in progress for the
   // client, and causes further calls to return Cancelled status.
   void TryCancel();
@@ -14,9 +14,11 @@ limitations under the License.
 ==============================================================================*/
 #include "tensorflow/core/data/service/worker_client.h"
 
+#include <algorithm>
 #include <memory>
 #include <string>
 #include <utility>
+#include <vector>
 
 #include "absl/memory/memory.h"
 #include "absl/strings/substitute.h"
@@ -34,6 +36,7 @@ limitations under the License.
 #include "tensorflow/core/framework/tensor.h"
 #include "tensorflow/core/framework/tensor_testutil.h"
 #include "tensorflow/core/lib/core/status_test_util.h"
+#include "tensorflow/core/platform/env.h"
 #include "tensorflow/core/platform/errors.h"
 #include "tensorflow/core/platform/status.h"
 #include "tensorflow/core/platform/status_matchers.h"
@@ -47,6 +50,7 @@ namespace data {
 namespace {
 
 using ::tensorflow::data::testing::RangeSquareDataset;
+using ::tensorflow::data::testing::RangeSquareDatasetWithError;
 using ::tensorflow::testing::StatusIs;
 using ::testing::MatchesRegex;
 
@@ -64,10 +68,15 @@ class WorkerClientTest : public ::testing::Test {
   // Creates a dataset and returns the dataset ID.
   StatusOr<int64> RegisterDataset(const int64 range) {
     TF_ASSIGN_OR_RETURN(DatasetDef dataset_def, RangeSquareDataset(range));
+    return RegisterDataset(dataset_def);
+  }
+
+  // Registers `dataset_def` and returns the dataset ID.
+  StatusOr<int64> RegisterDataset(const DatasetDef& dataset_def) {
     int64 dataset_id = 0;
     absl::optional<std::string> element_spec;
     TF_RETURN_IF_ERROR(dispatcher_client_->RegisterDataset(
-        dataset_def, element_spec, dataset_id));
+        dataset_def, element_spec, COMPRESSION_NONE, dataset_id));
     return dataset_id;
   }
 
@@ -182,6 +191,141 @@ TEST_F(WorkerClientTest, GrpcRead) {
   EXPECT_TRUE(result.end_of_sequence);
 }
 
+TEST_F(WorkerClientTest, GrpcStreamRead) {
+  const int64 range = 5;
+  TF_ASSERT_OK_AND_ASSIGN(const int64 dataset_id, RegisterDataset(range));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 job_client_id, CreateJob(dataset_id));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 task_id, GetTaskToRead(job_client_id));
+  TF_ASSERT_OK_AND_ASSIGN(std::unique_ptr<DataServiceWorkerClient> client,
+                          GetWorkerClient(kGrpcStreamTransferProtocol));
+  for (int64 i = 0; i < range; ++i) {
+    TF_ASSERT_OK_AND_ASSIGN(GetElementResult result,
+                            GetElement(*client, task_id));
+    test::ExpectEqual(result.components[0], Tensor(int64{i * i}));
+    EXPECT_FALSE(result.end_of_sequence);
+  }
+  TF_ASSERT_OK_AND_ASSIGN(GetElementResult result,
+                          GetElement(*client, task_id));
+  EXPECT_TRUE(result.end_of_sequence);
+}
+
+TEST_F(WorkerClientTest, GrpcGetElements) {
+  const int64 range = 5;
+  TF_ASSERT_OK_AND_ASSIGN(const int64 dataset_id, RegisterDataset(range));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 job_client_id, CreateJob(dataset_id));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 task_id, GetTaskToRead(job_client_id));
+  TF_ASSERT_OK_AND_ASSIGN(std::unique_ptr<DataServiceWorkerClient> client,
+                          GetWorkerClient(kGrpcTransferProtocol));
+  EXPECT_TRUE(client->SupportsGetElements());
+  GetElementRequest request;
+  request.set_task_id(task_id);
+  std::vector<GetElementResult> results;
+  // The worker only waits for the first element of each call, so a call
+  // returns between one and `max_elements` elements. Requesting more elements
+  // than are left stops at the end of sequence.
+  while (results.empty() || !results.back().end_of_sequence) {
+    const size_t num_results = results.size();
+    TF_ASSERT_OK(client->GetElements(request, /*max_elements=*/3, results));
+    EXPECT_GE(results.size() - num_results, 1);
+    EXPECT_LE(results.size() - num_results, 3);
+  }
+  ASSERT_EQ(results.size(), range + 1);
+  for (int64 i = 0; i < range; ++i) {
+    test::ExpectEqual(results[i].components[0], Tensor(int64{i * i}));
+    EXPECT_FALSE(results[i].end_of_sequence);
+  }
+  EXPECT_TRUE(results[range].end_of_sequence);
+}
+
+TEST_F(WorkerClientTest, GrpcGetElementsReturnsBatches) {
+  const int64 range = 100;
+  TF_ASSERT_OK_AND_ASSIGN(const int64 dataset_id, RegisterDataset(range));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 job_client_id, CreateJob(dataset_id));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 task_id, GetTaskToRead(job_client_id));
+  TF_ASSERT_OK_AND_ASSIGN(std::unique_ptr<DataServiceWorkerClient> client,
+                          GetWorkerClient(kGrpcTransferProtocol));
+  GetElementRequest request;
+  request.set_task_id(task_id);
+  std::vector<GetElementResult> results;
+  // The worker produces elements ahead of requests, so a call made after it
+  // has caught up returns several elements at once.
+  size_t max_batch_size = 0;
+  while (results.empty() || !results.back().end_of_sequence) {
+    Env::Default()->SleepForMicroseconds(10000);
+    const size_t num_results = results.size();
+    TF_ASSERT_OK(client->GetElements(
+        request, /*max_elements=*/kMaxGetElementsBatchSize, results));
+    max_batch_size = std::max(max_batch_size, results.size() - num_results);
+  }
+  EXPECT_GT(max_batch_size, 1);
+  EXPECT_LE(max_batch_size, kMaxGetElementsBatchSize);
+  ASSERT_EQ(results.size(), range + 1);
+  for (int64 i = 0; i < range; ++i) {
+    test::ExpectEqual(results[i].components[0], Tensor(int64{i * i}));
+  }
+}
+
+TEST_F(WorkerClientTest, LocalGetElements) {
+  const int64 range = 5;
+  TF_ASSERT_OK_AND_ASSIGN(const int64 dataset_id, RegisterDataset(range));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 job_client_id, CreateJob(dataset_id));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 task_id, GetTaskToRead(job_client_id));
+  TF_ASSERT_OK_AND_ASSIGN(std::unique_ptr<DataServiceWorkerClient> client,
+                          GetWorkerClient(kLocalTransferProtocol));
+  // Without a batched transfer, each call fetches a single element rather
+  // than blocking on the following ones.
+  EXPECT_FALSE(client->SupportsGetElements());
+  GetElementRequest request;
+  request.set_task_id(task_id);
+  for (int64 i = 0; i < range; ++i) {
+    std::vector<GetElementResult> results;
+    TF_ASSERT_OK(client->GetElements(request, /*max_elements=*/3, results));
+    ASSERT_EQ(results.size(), 1);
+    test::ExpectEqual(results[0].components[0], Tensor(int64{i * i}));
+    EXPECT_FALSE(results[0].end_of_sequence);
+  }
+}
+
+TEST_F(WorkerClientTest, GrpcGetElementsWithError) {
+  const int64 range = 5;
+  const int64 error_index = 2;
+  TF_ASSERT_OK_AND_ASSIGN(DatasetDef dataset_def,
+                          RangeSquareDatasetWithError(range, error_index));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 dataset_id, RegisterDataset(dataset_def));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 job_client_id, CreateJob(dataset_id));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 task_id, GetTaskToRead(job_client_id));
+  TF_ASSERT_OK_AND_ASSIGN(std::unique_ptr<DataServiceWorkerClient> client,
+                          GetWorkerClient(kGrpcTransferProtocol));
+  GetElementRequest request;
+  request.set_task_id(task_id);
+  std::vector<GetElementResult> results;
+  // The error reaches the client after the elements produced before it,
+  // whether it arrives on its own or at the end of a batch.
+  Status s;
+  while (s.ok() && (results.empty() || !results.back().end_of_sequence)) {
+    s = client->GetElements(request, /*max_elements=*/range, results);
+  }
+  EXPECT_THAT(s, StatusIs(error::INVALID_ARGUMENT));
+  ASSERT_EQ(results.size(), error_index);
+  for (int64 i = 0; i < error_index; ++i) {
+    test::ExpectEqual(results[i].components[0], Tensor(int64{i * i}));
+    EXPECT_FALSE(results[i].end_of_sequence);
+  }
+}
+
+TEST_F(WorkerClientTest, CancelGrpcStreamClient) {
+  TF_ASSERT_OK_AND_ASSIGN(const int64 dataset_id, RegisterDataset(/*range=*/5));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 job_client_id, CreateJob(dataset_id));
+  TF_ASSERT_OK_AND_ASSIGN(const int64 task_id, GetTaskToRead(job_client_id));
+  TF_ASSERT_OK_AND_ASSIGN(std::unique_ptr<DataServiceWorkerClient> client,
+                          GetWorkerClient(kGrpcStreamTransferProtocol));
+  TF_ASSERT_OK(GetElement(*client, task_id).status());
+
+  client->TryCancel();
+  EXPECT_THAT(GetElement(*client, task_id),
+              StatusIs(error::CANCELLED, MatchesRegex(".*cancelled.*")));
+}
+
 TEST_F(WorkerClientTest, LocalServerShutsDown) {
   TF_ASSERT_OK_AND_ASSIGN(const int64 dataset_id, RegisterDataset(/*range=*/5));
   TF_ASSERT_OK_AND_ASSIGN(const int64 job_client_id, CreateJob(dataset_id));
@@ -15,6 +15,7 @@ limitations under the License.
 
 #include "tensorflow/core/data/service/worker_impl.h"
 
+#include <algorithm>
 #include <memory>
 #include <string>
 #include <utility>
@@ -80,7 +81,26 @@ Status MoveElementToResponse(std::vector<Tensor>&& element,
         "it produced ",
         variant.TypeName());
   }
-  *resp.mutable_compressed() = *compressed;
+  if (element[0].RefCountIsOne()) {
+    // Nothing else references the element, so its payload can be moved into
+    // the response instead of being copied.
+    *resp.mutable_compressed() = std::move(*compressed);
+  } else {
+    *resp.mutable_compressed() = *compressed;
+  }
+  return Status::OK();
+}
+
+// Fills `resp` from `result`, moving the element's components.
+Status ResultToResponse(int64 task_id, struct GetElementResult& result,
+                        GetElementResponse& resp) {
+  resp.set_end_of_sequence(result.end_of_sequence);
+  resp.set_skip_task(result.skip);
+  if (!resp.end_of_sequence() && !resp.skip_task()) {
+    TF_RETURN_IF_ERROR(
+        MoveElementToResponse(std::move(result.components), resp));
+    VLOG(3) << "Producing an element for task " << task_id;
+  }
   return Status::OK();
 }
 }  // namespace
@@ -159,6 +179,14 @@ void DataServiceWorkerImpl::Stop() {
 
 Status DataServiceWorkerImpl::GetElementResult(
     const GetElementRequest* request, struct GetElementResult* result) {
+  bool ready;
+  return GetElementResultInternal(request, /*wait=*/true, result, ready);
+}
+
+Status DataServiceWorkerImpl::GetElementResultInternal(
+    const GetElementRequest* request, bool wait,
+    struct GetElementResult* result, bool& ready) {
+  ready = true;
   Task* task;
   {
     mutex_lock l(mu_);
@@ -194,7 +222,15 @@ Status DataServiceWorkerImpl::GetElementResult(
     task->outstanding_requests--;
     cv_.notify_all();
   });
-  TF_RETURN_IF_ERROR(task->task_runner->GetNext(*request, *result));
+  if (wait) {
+    TF_RETURN_IF_ERROR(task->task_runner->GetNext(*request, *result));
+  } else {
+    TF_RETURN_IF_ERROR(
+        task->task_runner->TryGetNext(*request, *result, ready));
+    if (!ready) {
+      return Status::OK();
+    }
+  }
 
   if (result->end_of_sequence) {
     mutex_lock l(mu_);
@@ -324,12 +360,52 @@ Status DataServiceWorkerImpl::GetElement(const GetElementRequest* request,
   VLOG(3) << "Received GetElement request for task " << request->task_id();
   struct GetElementResult result;
   TF_RETURN_IF_ERROR(GetElementResult(request, &result));
-  response->set_end_of_sequence(result.end_of_sequence);
-  response->set_skip_task(result.skip);
-  if (!response->end_of_sequence() && !response->skip_task()) {
-    TF_RETURN_IF_ERROR(
-        MoveElementToResponse(std::move(result.components), *response));
-    VLOG(3) << "Producing an element for task " << request->task_id();
+  return ResultToResponse(request->task_id(), result, *response);
+}
+
+Status DataServiceWorkerImpl::GetElements(const GetElementsRequest* request,
+                                          GetElementsResponse* response) {
+  VLOG(3) << "Received GetElements request for task "
+          << request->request().task_id();
+  if (request->request().optional_consumer_index_case() !=
+      GetElementRequest::OPTIONAL_CONSUMER_INDEX_NOT_SET) {
+    return errors::InvalidArgument(
+        "GetElements does not support round-robin reads");
+  }
+  if (request->max_elements() < 1) {
+    return errors::InvalidArgument("max_elements must be positive, but got ",
+                                   request->max_elements());
+  }
+  const int64 max_elements =
+      std::min<int64>(request->max_elements(), kMaxGetElementsBatchSize);
+  for (int64 i = 0; i < max_elements; ++i) {
+    struct GetElementResult result;
+    bool ready;
+    // Only wait for the first element, so that elements which are ready are
+    // not held back while the task produces the next ones.
+    Status s = GetElementResultInternal(&request->request(), /*wait=*/i == 0,
+                                        &result, ready);
+    if (s.ok() && !ready) {
+      break;
+    }
+    GetElementResponse* element = response->add_elements();
+    if (s.ok()) {
+      s = ResultToResponse(request->request().task_id(), result, *element);
+    }
+    if (!s.ok()) {
+      response->mutable_elements()->RemoveLast();
+      if (response->elements().empty()) {
+        return s;
+      }
+      // The failed element has been consumed from the task, so return the
+      // error after the elements produced before it instead of dropping it.
+      response->set_status_code(s.code());
+      response->set_status_error_message(s.error_message());
+      break;
+    }
+    if (element->end_of_sequence() || element->skip_task()) {
+      break;
+    }
   }
   return Status::OK();
 }
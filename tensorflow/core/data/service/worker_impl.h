@@ -73,6 +73,8 @@ class DataServiceWorkerImpl {
   /// Client-facing API.
   Status GetElement(const GetElementRequest* request,
                     GetElementResponse* response);
+  Status GetElements(const GetElementsRequest* request,
+                     GetElementsResponse* response);
   Status GetWorkerTasks(const GetWorkerTasksRequest* request,
                         GetWorkerTasksResponse* response);
 
@@ -89,6 +91,12 @@ class DataServiceWorkerImpl {
 
   // Sends task status to the dispatcher and checks for dispatcher commands.
   Status SendTaskUpdates() TF_LOCKS_EXCLUDED(mu_);
+  // Serves a GetElement request like `GetElementResult`. If `wait` is false
+  // and the task has no element ready, returns OK and sets `ready` to false
+  // instead of waiting for the next element.
+  Status GetElementResultInternal(const GetElementRequest* request, bool wait,
+                                  struct GetElementResult* result,
+                                  bool& ready);
   // Creates an iterator to process a task.
   Status ProcessTaskInternal(const TaskDef& task)
       TF_EXCLUSIVE_LOCKS_REQUIRED(mu_);
@@ -1170,6 +1170,62 @@ TEST_P(OptimizeZeroRamBudgetTest, Model) {
 INSTANTIATE_TEST_SUITE_P(Test, OptimizeZeroRamBudgetTest,
                          ::testing::Values(0, 1));
 
+class OptimizeBufferSizeTest : public ::testing::TestWithParam<int64> {};
+
+// A buffer size parameter on top of a node which takes as long to produce an
+// element as the consumer takes to consume it, as with the autotuned limit on
+// outstanding requests of the tf.data service client. The buffer size should
+// grow well past its minimum until it runs into the RAM budget.
+TEST_P(OptimizeBufferSizeTest, Model) {
+  const int64 ram_budget = GetParam();
+  constexpr int64 kElementSize = 1024;
+  constexpr int64 kProcessingTimeNanos = 1000000;
+
+  std::shared_ptr<Node> consumer =
+      model::MakeKnownRatioNode({1, "consumer", nullptr}, /*ratio=*/1);
+  consumer->record_start(1);
+  consumer->record_stop(1 + kProcessingTimeNanos);
+  consumer->record_element();
+
+  std::shared_ptr<mutex> mu = std::make_shared<mutex>();
+  std::shared_ptr<condition_variable> cv =
+      std::make_shared<condition_variable>();
+  std::shared_ptr<Node> buffer = model::MakeAsyncKnownRatioNode(
+      {2, "buffer", consumer}, /*ratio=*/1,
+      {model::MakeParameter(kBufferSize,
+                            std::make_shared<SharedState>(
+                                /*value=*/model::kAutotune, mu, cv),
+                            /*min=*/1, /*max=*/1024)});
+  buffer->record_bytes_produced(kElementSize);
+  buffer->record_buffer_event(kElementSize, 1);
+  buffer->record_element();
+
+  std::shared_ptr<Node> producer =
+      model::MakeKnownRatioNode({3, "producer", buffer}, /*ratio=*/1);
+  producer->record_start(1);
+  producer->record_stop(1 + kProcessingTimeNanos);
+  producer->record_element();
+
+  model::Model model;
+  model.AddNode([&consumer](model::Node::Args args) { return consumer; },
+                "consumer", nullptr, &consumer);
+  model.AddNode([&buffer](model::Node::Args args) { return buffer; }, "buffer",
+                consumer, &buffer);
+  model.AddNode([&producer](model::Node::Args args) { return producer; },
+                "producer", buffer, &producer);
+
+  CancellationManager cancellation_manager;
+  model.Optimize(model::AutotuneAlgorithm::HILL_CLIMB, /*cpu_budget=*/4,
+                 ram_budget, /*model_input_time=*/0, &cancellation_manager);
+  const double buffer_size = buffer->parameter_value(kBufferSize);
+  EXPECT_GT(buffer_size, 4);
+  // The optimization stops after the first step which exceeds the budget.
+  EXPECT_LE(buffer_size * kElementSize, ram_budget + kElementSize);
+}
+
+INSTANTIATE_TEST_SUITE_P(Test, OptimizeBufferSizeTest,
+                         ::testing::Values(16 * 1024, 1024 * 1024));
+
 TEST(RecordTimeTest, RecordTimeTest) {
   std::shared_ptr<Node> source = model::MakeSourceNode({});
   EXPECT_FALSE(source->is_recording());
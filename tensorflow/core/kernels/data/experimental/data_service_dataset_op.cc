@@ -14,6 +14,7 @@ limitations under the License.
 ==============================================================================*/
 #include "tensorflow/core/kernels/data/experimental/data_service_dataset_op.h"
 
+#include <algorithm>
 #include <limits>
 #include <map>
 #include <memory>
@@ -26,6 +27,7 @@ limitations under the License.
 #include "absl/strings/ascii.h"
 #include "absl/strings/str_cat.h"
 #include "absl/strings/string_view.h"
+#include "tensorflow/core/data/compression_utils.h"
 #include "tensorflow/core/data/dataset.pb.h"
 #include "tensorflow/core/data/dataset_utils.h"
 #include "tensorflow/core/data/name_utils.h"
@@ -46,6 +48,8 @@ limitations under the License.
 #include "tensorflow/core/framework/types.pb.h"
 #include "tensorflow/core/lib/core/errors.h"
 #include "tensorflow/core/lib/gtl/cleanup.h"
+#include "tensorflow/core/platform/cpu_info.h"
+#include "tensorflow/core/platform/env_time.h"
 #include "tensorflow/core/platform/errors.h"
 #include "tensorflow/core/platform/mutex.h"
 #include "tensorflow/core/platform/snappy.h"
@@ -74,6 +78,7 @@ namespace data {
 /* static */ constexpr const char* const
     DataServiceDatasetOp::kTaskRefreshIntervalHintMs;
 /* static */ constexpr const char* const DataServiceDatasetOp::kTargetWorkers;
+/* static */ constexpr const char* const DataServiceDatasetOp::kUncompress;
 /* static */ constexpr const char* const
     DataServiceDatasetOp::kIterationCounter;
 /* static */ constexpr const char* const DataServiceDatasetOp::kOutputTypes;
@@ -83,6 +88,10 @@ namespace {
 // Default interval between task list refreshes.
 const int64 kDefaultTaskRefreshIntervalMs = 1000;  // 1 second.
 
+// Upper bound on the autotuned number of outstanding requests. The RAM budget
+// of the autotuning model usually limits it well before this.
+constexpr int64 kMaxAutotunedOutstandingRequests = 1024;
+
 constexpr char kDataServiceDatasetV1[] = "DataServiceDataset";
 constexpr char kDataServiceDatasetV2[] = "DataServiceDatasetV2";
 }  // namespace
@@ -101,7 +110,8 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
           const std::string& job_name, absl::optional<int64> consumer_index,
           absl::optional<int64> num_consumers, int64 max_outstanding_requests,
           int64 task_refresh_interval_ms, const TargetWorkers target_workers,
-          IterationCounter* iteration_counter, bool owns_resource,
+          bool uncompress, IterationCounter* iteration_counter,
+          bool owns_resource,
           ResourceHandle iteration_counter_handle,
           const DataTypeVector& output_types,
           const std::vector<PartialTensorShape>& output_shapes)
@@ -118,6 +128,7 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
         max_outstanding_requests_(max_outstanding_requests),
         task_refresh_interval_ms_(task_refresh_interval_ms),
         target_workers_(target_workers),
+        uncompress_(uncompress),
         iteration_counter_(iteration_counter),
         owns_resource_(owns_resource),
         iteration_counter_handle_(iteration_counter_handle),
@@ -226,13 +237,18 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
     AttrValue target_workers;
     b->BuildAttrValue(TargetWorkersToString(target_workers_), &target_workers);
 
-    TF_RETURN_IF_ERROR(b->AddDataset(
-        this, inputs,
-        {std::make_pair(kTaskRefreshIntervalHintMs,
-                        task_refresh_interval_hint_ms),
-         std::make_pair(kDataTransferProtocol, data_transfer_protocol),
-         std::make_pair(kTargetWorkers, target_workers)},
-        output));
+    std::vector<std::pair<StringPiece, AttrValue>> attrs = {
+        std::make_pair(kTaskRefreshIntervalHintMs,
+                       task_refresh_interval_hint_ms),
+        std::make_pair(kDataTransferProtocol, data_transfer_protocol),
+        std::make_pair(kTargetWorkers, target_workers)};
+    if (op_version_ == 2) {
+      AttrValue uncompress;
+      b->BuildAttrValue(uncompress_, &uncompress);
+      attrs.push_back(std::make_pair(kUncompress, uncompress));
+    }
+
+    TF_RETURN_IF_ERROR(b->AddDataset(this, inputs, attrs, output));
     return Status::OK();
   }
 
@@ -242,7 +258,15 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
     explicit Iterator(const Params& params, int64 iterator_index)
         : DatasetIterator<Dataset>(params),
           iterator_index_(iterator_index),
-          max_outstanding_requests_(params.dataset->max_outstanding_requests_) {
+          mu_(std::make_shared<mutex>()),
+          worker_thread_cv_(std::make_shared<condition_variable>()),
+          autotuned_max_outstanding_requests_(
+              std::make_shared<model::SharedState>(model::kAutotune, mu_,
+                                                   worker_thread_cv_)) {
+      // Start from the least limit `MaxOutstandingRequests` allows, one
+      // outstanding request per task, and let the autotuning model raise it if
+      // the consumer would otherwise wait on the workers.
+      autotuned_max_outstanding_requests_->value = 1;
     }
 
     ~Iterator() override {
@@ -260,6 +284,11 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       for (auto& worker_thread : worker_threads_) {
         worker_thread.reset();
       }
+      // Waits for scheduled uncompressions, which access the iterator.
+      uncompress_pool_.reset();
+      if (fetch_node_) {
+        model_->RemoveNode(fetch_node_);
+      }
 
       VLOG(1) << "Destroyed data service dataset iterator for job id "
               << job_client_id_;
@@ -292,6 +321,36 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
                           dataset()->address_),
           deadline_micros));
       initialized_ = true;
+      if (dataset()->max_outstanding_requests_ == model::kAutotune &&
+          ctx->model()) {
+        // Model the time spent fetching elements from the workers as the
+        // input of this iterator, so that the autotuning model can tell how
+        // much of it outstanding requests hide from the consumer.
+        model_ = ctx->model();
+        model_->AddNode(
+            [](model::Node::Args args) {
+              return model::MakeKnownRatioNode(std::move(args), /*ratio=*/1);
+            },
+            strings::StrCat(prefix(), "::Fetch"), model_node(), &fetch_node_);
+      }
+      if (dataset()->uncompress_) {
+        TF_RETURN_IF_ERROR(InitializeUncompress(deadline_micros));
+      }
+      if (uncompress_) {
+        // Uncompress elements off the worker threads, of which there may be
+        // as few as one per task, so that fetching and uncompressing overlap
+        // and uncompression is not limited by the number of tasks.
+        uncompress_pool_ = ctx->CreateThreadPool(
+            "tf_data_service_uncompress", port::MaxParallelism());
+      }
+      if (dataset()->job_name_.empty()) {
+        // The job belongs to this iterator alone, so start fetching elements
+        // right away to overlap the first requests with the consumer's
+        // startup. Shared jobs wait for the first `GetNext` so that an unused
+        // iterator does not take elements from the other consumers.
+        mutex_lock l(*mu_);
+        EnsureThreadsStarted(ctx);
+      }
       return Status::OK();
     }
 
@@ -299,7 +358,7 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
                            std::vector<Tensor>* out_tensors,
                            bool* end_of_sequence) override {
       VLOG(3) << "Calling GetNext in data service dataset op";
-      mutex_lock l(mu_);
+      mutex_lock l(*mu_);
       EnsureThreadsStarted(ctx);
       bool skip = true;
       while (skip) {
@@ -313,13 +372,17 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
                   << " finished_tasks_:" << finished_tasks_
                   << " num_running_worker_threads_:"
                   << num_running_worker_threads_;
+          RecordStop(ctx);
           get_next_cv_.wait(l);
+          RecordStart(ctx);
         }
         if (cancelled_) {
           VLOG(3) << "Returning from GetNext due to cancellation";
           return errors::Cancelled("Data service iterator was cancelled");
         }
-        if (!status_.ok()) {
+        // Return the results which are ready before the error, since they
+        // were produced before it.
+        if (!status_.ok() && (results_.empty() || !results_.front().ready)) {
           VLOG(3) << "Returning from GetNext with error " << status_;
           return status_;
         }
@@ -331,12 +394,13 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
         skip = results_.front().skip;
         if (skip) {
           results_.pop();
-          worker_thread_cv_.notify_one();
+          worker_thread_cv_->notify_one();
         }
       }
       auto& result = results_.front();
       *end_of_sequence = result.end_of_sequence;
       if (!*end_of_sequence) {
+        RecordBufferDequeue(ctx, result.element);
         out_tensors->swap(result.element);
         if (StrictRoundRobin()) {
           VLOG(1) << "Consumer " << dataset()->consumer_index_.value()
@@ -346,15 +410,28 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
         }
       }
       results_.pop();
-      worker_thread_cv_.notify_one();
+      worker_thread_cv_->notify_one();
       return Status::OK();
     }
 
    protected:
     std::shared_ptr<model::Node> CreateNode(
         IteratorContext* ctx, model::Node::Args args) const override {
-      return model::MakeKnownRatioNode(std::move(args),
-                                       /*ratio=*/1);
+      if (dataset()->max_outstanding_requests_ != model::kAutotune) {
+        return model::MakeKnownRatioNode(std::move(args),
+                                         /*ratio=*/1);
+      }
+      // Worker threads stay capped at one per task, so the tuned value is the
+      // total number of results which may be buffered or in flight rather than
+      // the parallelism. The autotuning model charges it against the RAM
+      // budget as `value` buffered elements.
+      return model::MakeAsyncKnownRatioNode(
+          std::move(args),
+          /*ratio=*/1,
+          {model::MakeParameter(model::kBufferSize,
+                                autotuned_max_outstanding_requests_,
+                                /*min=*/1,
+                                /*max=*/kMaxAutotunedOutstandingRequests)});
     }
 
     Status SaveInternal(SerializationContext* ctx,
@@ -370,9 +447,11 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
     data::TraceMeMetadata GetTraceMeMetadata() const override {
       data::TraceMeMetadata result;
       int64 num_tasks = -1;
-      if (mu_.try_lock()) {
+      int64 max_outstanding_requests = -1;
+      if (mu_->try_lock()) {
         num_tasks = tasks_.size() - finished_tasks_;
-        mu_.unlock();
+        max_outstanding_requests = MaxOutstandingRequests();
+        mu_->unlock();
       }
       result.push_back(std::make_pair(
           "num_tasks",
@@ -382,8 +461,10 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       result.push_back(std::make_pair("job_name", dataset()->job_name_));
       result.push_back(std::make_pair(
           "max_outstanding_requests",
-          strings::Printf("%lld", static_cast<long long>(
-                                      dataset()->max_outstanding_requests_))));
+          max_outstanding_requests == -1
+              ? kTraceInfoUnavailable
+              : strings::Printf(
+                    "%lld", static_cast<long long>(max_outstanding_requests))));
       return result;
     }
 
@@ -422,6 +503,31 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       bool skip TF_GUARDED_BY(&Iterator::mu_) = false;
     };
 
+    // Looks up how the registered dataset was compressed, to uncompress its
+    // elements only if they were compressed.
+    Status InitializeUncompress(int64 deadline_micros) {
+      DatasetCompression compression = COMPRESSION_UNSPECIFIED;
+      Status s = grpc_util::Retry(
+          [&]() {
+            return dispatcher_->GetDatasetCompression(dataset()->dataset_id_,
+                                                      compression);
+          },
+          /*description=*/
+          strings::StrCat("get dataset compression from dispatcher at ",
+                          dataset()->address_),
+          deadline_micros);
+      if (errors::IsUnimplemented(s)) {
+        // Older dispatchers don't record the compression.
+        compression = COMPRESSION_UNSPECIFIED;
+      } else {
+        TF_RETURN_IF_ERROR(s);
+      }
+      // Registrations which don't specify a compression were compressed
+      // whenever their readers were asked to uncompress.
+      uncompress_ = compression != COMPRESSION_NONE;
+      return Status::OK();
+    }
+
     Status ValidateDataset() const {
       if (dataset()->target_workers_ == TargetWorkers::LOCAL &&
           LocalWorkers::Empty()) {
@@ -438,15 +544,15 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
     }
 
     // Returns whether all local tasks have finished.
-    bool LocalTasksFinished() const TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+    bool LocalTasksFinished() const TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       return !tasks_.empty() && finished_tasks_ >= tasks_.size();
     }
 
     // Returns whether the iterator has finished and should return.
     // If `target_workers_` is LOCAL, it waits for all local tasks to finish.
     // If `target_workers_` is ANY, it waits for the job to finish.
-    bool Finished() const TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
-      if (num_running_worker_threads_ > 0) {
+    bool Finished() const TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
+      if (num_running_worker_threads_ > 0 || num_pending_uncompressions_ > 0) {
         return false;
       }
       if (dataset()->target_workers_ == TargetWorkers::LOCAL) {
@@ -456,7 +562,7 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
     }
 
     void EnsureThreadsStarted(IteratorContext* ctx)
-        TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+        TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       if (!task_thread_manager_ && !cancelled_) {
         auto new_ctx = std::make_shared<IteratorContext>(*ctx);
         task_thread_manager_ =
@@ -465,13 +571,13 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       }
     }
 
-    void CancelThreads() TF_LOCKS_EXCLUDED(mu_) {
-      mutex_lock l(mu_);
+    void CancelThreads() TF_LOCKS_EXCLUDED(*mu_) {
+      mutex_lock l(*mu_);
       for (const auto& task : tasks_) {
         task->worker->TryCancel();
       }
       cancelled_ = true;
-      worker_thread_cv_.notify_all();
+      worker_thread_cv_->notify_all();
       manager_thread_cv_.notify_all();
       get_next_cv_.notify_all();
     }
@@ -487,7 +593,7 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       uint64 next_check = Env::Default()->NowMicros();
       while (true) {
         {
-          mutex_lock l(mu_);
+          mutex_lock l(*mu_);
           // All units are microseconds.
           while (!cancelled_ && Env::Default()->NowMicros() < next_check) {
             int64 remaining_time = next_check - Env::Default()->NowMicros();
@@ -502,13 +608,13 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
           }
         }
         Heartbeat();
-        UpdateWorkerThreads(ctx.get());
+        UpdateWorkerThreads(ctx);
         next_check = Env::Default()->NowMicros() +
                      dataset()->task_refresh_interval_ms_ * 1000;
       }
     }
 
-    void TryBlockRound(int64 round) TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+    void TryBlockRound(int64 round) TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       if (round_robin_round_limit_.has_value() &&
           round_robin_round_limit_.value() == round) {
         return;
@@ -525,23 +631,25 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       round_robin_round_limit_ = round;
     }
 
-    void UpdateJobFinished(bool job_finished) TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+    void UpdateJobFinished(bool job_finished)
+        TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       if (!job_finished) {
         return;
       }
       job_finished_ = true;
       get_next_cv_.notify_all();
-      worker_thread_cv_.notify_all();
+      worker_thread_cv_->notify_all();
     }
 
-    Status AddTask(const TaskInfo& task_info) TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+    Status AddTask(const TaskInfo& task_info)
+        TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       TF_ASSIGN_OR_RETURN(
           std::unique_ptr<DataServiceWorkerClient> worker,
           CreateDataServiceWorkerClient(task_info.transfer_address(),
                                         dataset()->protocol_,
                                         dataset()->data_transfer_protocol_));
       tasks_.push_back(std::make_shared<Task>(task_info, std::move(worker)));
-      worker_thread_cv_.notify_one();
+      worker_thread_cv_->notify_one();
       if (StrictRoundRobin()) {
         VLOG(1) << "Consumer " << dataset()->consumer_index_.value()
                 << " adding task " << task_info.task_id()
@@ -555,11 +663,11 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       return Status::OK();
     }
 
-    void Heartbeat() TF_LOCKS_EXCLUDED(mu_) {
+    void Heartbeat() TF_LOCKS_EXCLUDED(*mu_) {
       ClientHeartbeatRequest req;
       req.set_job_client_id(job_client_id_);
       if (StrictRoundRobin()) {
-        mutex_lock l(mu_);
+        mutex_lock l(*mu_);
         req.set_current_round(current_round_);
         if (round_robin_round_limit_.has_value()) {
           req.set_blocked_round(round_robin_round_limit_.value());
@@ -577,24 +685,24 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
               << ". Error: " << s;
           return;
         }
-        mutex_lock l(mu_);
+        mutex_lock l(*mu_);
         status_ = s;
         get_next_cv_.notify_all();
       }
-      mutex_lock l(mu_);
+      mutex_lock l(*mu_);
       UpdateJobFinished(resp.job_finished());
       if (resp.optional_block_round_case() ==
           ClientHeartbeatResponse::kBlockRound) {
         TryBlockRound(resp.block_round());
       } else {
         round_robin_round_limit_ = absl::nullopt;
-        worker_thread_cv_.notify_all();
+        worker_thread_cv_->notify_all();
       }
       UpdateTasks(resp);
     }
 
     void UpdateTasks(const ClientHeartbeatResponse& resp)
-        TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+        TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       absl::flat_hash_map<int64, TaskInfo> task_id_to_task;
       for (auto& task : resp.task_info()) {
         task_id_to_task[task.task_id()] = task;
@@ -641,10 +749,6 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
           break;
         }
       }
-      if (dataset()->max_outstanding_requests_ == model::kAutotune) {
-        // Adjust max_outstanding_requests to account for newly added tasks.
-        max_outstanding_requests_ = tasks_.size();
-      }
     }
 
     bool ShouldReadFromTask(const TaskInfo& task) const {
@@ -655,26 +759,35 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       return true;
     }
 
-    void UpdateWorkerThreads(IteratorContext* ctx) TF_LOCKS_EXCLUDED(mu_) {
-      mutex_lock l(mu_);
-      while (num_running_worker_threads_ < max_outstanding_requests_ &&
-             !cancelled_ && status_.ok()) {
+    void UpdateWorkerThreads(std::shared_ptr<IteratorContext> ctx)
+        TF_LOCKS_EXCLUDED(*mu_) {
+      mutex_lock l(*mu_);
+      // Each task serves one request at a time, so when autotuning there is
+      // no use for more threads than tasks. Additional outstanding requests
+      // are buffered results.
+      int64 max_worker_threads =
+          dataset()->max_outstanding_requests_ == model::kAutotune
+              ? tasks_.size()
+              : dataset()->max_outstanding_requests_;
+      while (num_running_worker_threads_ < max_worker_threads && !cancelled_ &&
+             status_.ok()) {
         num_running_worker_threads_++;
         outstanding_requests_++;
         auto done = [this]() {
-          mutex_lock l(mu_);
+          mutex_lock l(*mu_);
           num_running_worker_threads_--;
           outstanding_requests_--;
           get_next_cv_.notify_all();
         };
         worker_threads_.push_back(ctx->StartThread(
-            "tf-data-service-task_thread", [this, done = std::move(done)]() {
-              RunWorkerThread(std::move(done));
+            "tf-data-service-task_thread",
+            [this, ctx, done = std::move(done)]() {
+              RunWorkerThread(ctx, std::move(done));
             }));
       }
     }
 
-    void AdvanceTaskIndex() TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+    void AdvanceTaskIndex() TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       next_task_index_++;
       if (next_task_index_ >= tasks_.size()) {
         current_round_++;
@@ -683,7 +796,7 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
     }
 
     // Searches for a task to process, returning nullptr if none is found.
-    std::shared_ptr<Task> GetTaskToProcess() TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+    std::shared_ptr<Task> GetTaskToProcess() TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       VLOG(4) << "Searching for task to process";
       for (int i = 0; i < tasks_.size(); ++i) {
         std::shared_ptr<Task>& task = tasks_[next_task_index_];
@@ -715,25 +828,31 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       return nullptr;
     }
 
-    void RunWorkerThread(std::function<void()> done) {
+    void RunWorkerThread(std::shared_ptr<IteratorContext> ctx,
+                         std::function<void()> done) {
       auto cleanup = gtl::MakeCleanup([done = std::move(done)]() {
         done();
         VLOG(1) << "Worker thread exiting";
       });
       VLOG(1) << "Starting worker thread";
       std::shared_ptr<Task> task_to_process;
+      // The number of elements the current request counts for in
+      // `outstanding_requests_`.
+      int64 num_requested = 1;
       while (true) {
         Result* result;
         {
-          mutex_lock l(mu_);
+          mutex_lock l(*mu_);
           if (task_to_process) {
             task_to_process->in_use = false;
             task_to_process = nullptr;
-            worker_thread_cv_.notify_one();
+            worker_thread_cv_->notify_one();
           }
-          outstanding_requests_--;
+          outstanding_requests_ -= num_requested;
           while (true) {
-            if (cancelled_ || job_finished_ ||
+            // After an error, stop requesting new elements, so that `GetNext`
+            // reaches the error once the buffered results are consumed.
+            if (cancelled_ || job_finished_ || !status_.ok() ||
                 (dataset()->target_workers_ == TargetWorkers::LOCAL &&
                  LocalTasksFinished())) {
               return;
@@ -744,9 +863,10 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
                 break;
               }
             }
-            worker_thread_cv_.wait(l);
+            worker_thread_cv_->wait(l);
           }
-          outstanding_requests_++;
+          num_requested = ElementsToRequest(*task_to_process);
+          outstanding_requests_ += num_requested;
           if (StrictRoundRobin()) {
             // Reserve a spot in the results_ queue.
             results_.emplace();
@@ -759,15 +879,18 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
         int64 deadline_micros = kint64max;
         Status s;
         if (StrictRoundRobin()) {
-          s = GetElementTraced(task_to_process.get(), deadline_micros,
-                               /*enqueue_result=*/false, *result);
+          s = GetElementTraced(ctx, task_to_process.get(), deadline_micros,
+                               /*enqueue_result=*/false, num_requested,
+                               *result);
         } else {
           Result r;
-          s = GetElementTraced(task_to_process.get(), deadline_micros,
-                               /*enqueue_result=*/true, r);
+          s = GetElementTraced(ctx, task_to_process.get(), deadline_micros,
+                               /*enqueue_result=*/true, num_requested, r);
         }
         if (!s.ok()) {
-          mutex_lock l(mu_);
+          mutex_lock l(*mu_);
+          // `done` releases one outstanding request when the thread exits.
+          outstanding_requests_ -= num_requested - 1;
           VLOG(1) << "Failed to get element from worker "
                   << task_to_process->info.worker_address() << ": " << s;
           task_to_process->in_use = false;
@@ -781,7 +904,8 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       }
     }
 
-    Status TryGetElement(const Task& task, GetElementResult& result) {
+    Status TryGetElements(const Task& task, int64 max_elements,
+                          std::vector<GetElementResult>& results) {
       GetElementRequest req;
       req.set_task_id(task.info.task_id());
       req.set_skipped_previous_round(task.skipped_previous_round);
@@ -792,13 +916,17 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
         req.set_round_index(task.round);
         req.set_allow_skip(true);
       }
-      return task.worker->GetElement(req, result);
+      if (StrictRoundRobin() || max_elements == 1) {
+        results.emplace_back();
+        return task.worker->GetElement(req, results.back());
+      }
+      return task.worker->GetElements(req, max_elements, results);
     }
 
-    void ProcessGetElementResponse(bool enqueue_result,
+    void ProcessGetElementResponse(IteratorContext* ctx, bool enqueue_result,
                                    GetElementResult& get_element_result,
                                    Result& result, Task& task) {
-      mutex_lock l(mu_);
+      mutex_lock l(*mu_);
       result.ready = true;
       result.end_of_sequence = get_element_result.end_of_sequence;
       result.skip = get_element_result.skip;
@@ -807,6 +935,7 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
         result.element = std::move(get_element_result.components);
         result.element_index = get_element_result.element_index;
         result.task_id = task.info.task_id();
+        RecordBufferEnqueue(ctx, result.element);
       } else if (get_element_result.skip) {
         task.skipped_previous_round = true;
       } else {
@@ -819,9 +948,11 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       get_next_cv_.notify_all();
     }
 
-    Status GetElementTraced(Task* task, int64 deadline_micros,
-                            bool enqueue_result, Result& result)
-        TF_LOCKS_EXCLUDED(mu_) {
+    Status GetElementTraced(const std::shared_ptr<IteratorContext>& ctx,
+                            Task* task,
+                            int64 deadline_micros, bool enqueue_result,
+                            int64 max_elements, Result& result)
+        TF_LOCKS_EXCLUDED(*mu_) {
       VLOG(3) << "Getting an element for task id " << task->info.task_id();
       tensorflow::profiler::TraceMe activity(
           "GetDataServiceElement", tensorflow::profiler::TraceMeLevel::kInfo);
@@ -839,8 +970,9 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
                {"round_index", task->round}});
         });
       }
-      Status s = GetElement(task, deadline_micros, enqueue_result, result);
-      mutex_lock l(mu_);
+      Status s = GetElement(ctx, task, deadline_micros, enqueue_result,
+                            max_elements, result);
+      mutex_lock l(*mu_);
       VLOG(3) << "Returning from GetElement for task id "
               << task->info.task_id();
       return s;
@@ -858,12 +990,12 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
           },
           /*should_retry=*/
           [&] {
-            mutex_lock l(mu_);
+            mutex_lock l(*mu_);
             return !cancelled_;
           },
           /*description=*/"request task removal ", deadline_micros));
       if (removed) {
-        mutex_lock l(mu_);
+        mutex_lock l(*mu_);
         task.removed = true;
         result.ready = true;
         result.skip = true;
@@ -875,19 +1007,40 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
       return Status::OK();
     }
 
-    Status GetElement(Task* task, int64 deadline_micros, bool enqueue_result,
-                      Result& result) TF_LOCKS_EXCLUDED(mu_) {
-      GetElementResult get_element_result;
+    // Fetches up to `max_elements` elements from `task`. Fetching more than
+    // one element requires `enqueue_result`, since the elements are enqueued
+    // as separate results.
+    Status GetElement(const std::shared_ptr<IteratorContext>& ctx, Task* task,
+                      int64 deadline_micros, bool enqueue_result,
+                      int64 max_elements, Result& result)
+        TF_LOCKS_EXCLUDED(*mu_) {
+      DCHECK(enqueue_result || max_elements == 1);
+      std::vector<GetElementResult> get_element_results;
+      // An error which arrived after some of the requested elements. It is
+      // returned once those elements have been enqueued.
+      Status trailing_status;
       for (int num_retries = 0;; ++num_retries) {
-        Status s = TryGetElement(*task, get_element_result);
+        get_element_results.clear();
+        RecordFetchStart(ctx.get());
+        Status s = TryGetElements(*task, max_elements, get_element_results);
+        RecordFetchStop(ctx.get(), get_element_results);
         if (s.ok()) break;
         // Retry all errors that could indicate preemption.
-        if (!errors::IsUnavailable(s) && !errors::IsCancelled(s) &&
-            !errors::IsAborted(s)) {
+        bool retriable = errors::IsUnavailable(s) || errors::IsCancelled(s) ||
+                         errors::IsAborted(s);
+        if (!get_element_results.empty()) {
+          // Keep the elements fetched before the error. A retriable error is
+          // retried by the next request.
+          if (!retriable) {
+            trailing_status = s;
+          }
+          break;
+        }
+        if (!retriable) {
           return s;
         }
         {
-          mutex_lock l(mu_);
+          mutex_lock l(*mu_);
           if (cancelled_) {
             return errors::Cancelled("DataServiceDataset iterator cancelled");
           }
@@ -898,7 +1051,7 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
         }
         if (StrictRoundRobin() && num_retries > 0) {
           TF_RETURN_IF_ERROR(MaybeRemoveTask(*task, deadline_micros, result));
-          mutex_lock l(mu_);
+          mutex_lock l(*mu_);
           if (result.skip) {
             return Status::OK();
           }
@@ -912,24 +1065,177 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
                 << " microseconds";
         Env::Default()->SleepForMicroseconds(backoff_until - now_micros);
       }
-      ProcessGetElementResponse(enqueue_result, get_element_result, result,
-                                *task);
+      for (GetElementResult& get_element_result : get_element_results) {
+        if (dataset()->uncompress_ && !get_element_result.end_of_sequence &&
+            !get_element_result.skip) {
+          if (uncompress_) {
+            ScheduleUncompress(ctx, enqueue_result, get_element_result, result,
+                               *task);
+            continue;
+          }
+          TF_RETURN_IF_ERROR(
+              CheckComponentTypes(get_element_result.components));
+        }
+        ProcessGetElementResponse(ctx.get(), enqueue_result,
+                                  get_element_result, result, *task);
+      }
+      return trailing_status;
+    }
+
+    // Reserves the place of a compressed element in `results_` and
+    // uncompresses it on `uncompress_pool_`, marking the result ready when
+    // done. When doing round-robin reads, `result` is the place reserved for
+    // the element. Otherwise, the element may hold up the results behind it
+    // until it is uncompressed, but not while it is being fetched.
+    void ScheduleUncompress(std::shared_ptr<IteratorContext> ctx,
+                            bool enqueue_result,
+                            GetElementResult& get_element_result,
+                            Result& result, Task& task)
+        TF_LOCKS_EXCLUDED(*mu_) {
+      mutex_lock l(*mu_);
+      task.skipped_previous_round = false;
+      Result* pending = &result;
+      if (enqueue_result) {
+        results_.emplace();
+        pending = &results_.back();
+      }
+      pending->element_index = get_element_result.element_index;
+      pending->task_id = task.info.task_id();
+      num_pending_uncompressions_++;
+      auto components = std::make_shared<std::vector<Tensor>>(
+          std::move(get_element_result.components));
+      uncompress_pool_->Schedule([this, ctx = std::move(ctx), pending,
+                                  components = std::move(components)]() {
+        Status s = UncompressComponents(*components);
+        mutex_lock l(*mu_);
+        num_pending_uncompressions_--;
+        if (s.ok()) {
+          pending->element = std::move(*components);
+          pending->ready = true;
+          RecordBufferEnqueue(ctx.get(), pending->element);
+        } else if (status_.ok()) {
+          // `GetNext` returns the error when it reaches the element.
+          status_ = s;
+        }
+        get_next_cv_.notify_all();
+        worker_thread_cv_->notify_all();
+      });
+    }
+
+    // Records in `fetch_node_` that the calling worker thread has started
+    // fetching elements.
+    void RecordFetchStart(IteratorContext* ctx) {
+      if (fetch_node_ && ctx->model()->collect_resource_usage()) {
+        fetch_node_->record_start(EnvTime::NowNanos());
+      }
+    }
+
+    // Records in `fetch_node_` that the calling worker thread has stopped
+    // fetching elements, having received `results`.
+    void RecordFetchStop(IteratorContext* ctx,
+                         const std::vector<GetElementResult>& results) {
+      if (fetch_node_ && ctx->model()->collect_resource_usage()) {
+        fetch_node_->record_stop(EnvTime::NowNanos());
+        for (const GetElementResult& result : results) {
+          if (!result.end_of_sequence && !result.skip) {
+            fetch_node_->record_element();
+          }
+        }
+      }
+    }
+
+    // Replaces the single compressed variant in `components` with the
+    // uncompressed element components.
+    Status UncompressComponents(std::vector<Tensor>& components) const {
+      if (components.size() != 1 || components[0].dtype() != DT_VARIANT ||
+          !TensorShapeUtils::IsScalar(components[0].shape())) {
+        return errors::InvalidArgument(
+            "Expected the tf.data service to produce a compressed element, "
+            "but got ",
+            components.size(), " components. Check that the dataset was "
+            "registered with the same compression.");
+      }
+      const CompressedElement* compressed =
+          components[0].scalar<Variant>()().get<CompressedElement>();
+      if (compressed == nullptr) {
+        return errors::InvalidArgument(
+            "Input does not contain a compressed element. Instead got tensor ",
+            components[0].DebugString());
+      }
+      std::vector<Tensor> uncompressed;
+      TF_RETURN_IF_ERROR(UncompressElement(*compressed, &uncompressed));
+      TF_RETURN_IF_ERROR(CheckComponentTypes(uncompressed));
+      components = std::move(uncompressed);
+      return Status::OK();
+    }
+
+    // Checks that `components` match the dataset's output types, as the
+    // UncompressElement op does for its outputs.
+    Status CheckComponentTypes(const std::vector<Tensor>& components) const {
+      if (components.size() != dataset()->output_types_.size()) {
+        return errors::FailedPrecondition(
+            "Expected ", dataset()->output_types_.size(),
+            " components from the tf.data service, but got ",
+            components.size());
+      }
+      for (int i = 0; i < components.size(); ++i) {
+        if (components[i].dtype() != dataset()->output_types_[i]) {
+          return errors::FailedPrecondition(
+              "Expected a tensor of type ",
+              DataTypeString(dataset()->output_types_[i]),
+              " but got a tensor of type ",
+              DataTypeString(components[i].dtype()));
+        }
+      }
       return Status::OK();
     }
 
+    // Returns the current limit on outstanding requests. When it is
+    // autotuned, the limit allows at least one request per task so that no
+    // task is starved.
+    int64 MaxOutstandingRequests() const TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
+      if (dataset()->max_outstanding_requests_ != model::kAutotune) {
+        return dataset()->max_outstanding_requests_;
+      }
+      return std::max<int64>(
+          tasks_.size(),
+          static_cast<int64>(autotuned_max_outstanding_requests_->value));
+    }
+
+    // Returns how many elements to request from `task` at once. Fetching
+    // several elements per request amortizes the per-request overhead but
+    // delays the first of them, so only one element is requested while the
+    // consumer has nothing buffered. Round-robin reads take exactly one element
+    // per round, and transfer protocols without a batched `GetElements` would
+    // block on each additional element, so they also fetch one at a time.
+    int64 ElementsToRequest(const Task& task)
+        TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
+      if (StrictRoundRobin() || results_.empty() || tasks_.empty() ||
+          !task.worker->SupportsGetElements()) {
+        return 1;
+      }
+      int64 max_outstanding_requests = MaxOutstandingRequests();
+      int64 per_task =
+          max_outstanding_requests / static_cast<int64>(tasks_.size());
+      int64 available = max_outstanding_requests -
+                        static_cast<int64>(results_.size()) -
+                        outstanding_requests_;
+      return std::max<int64>(
+          1, std::min({per_task, available, kMaxGetElementsBatchSize}));
+    }
+
     // Reports whether we can request another element without violating
     // max_outstanding_requests.
-    bool ElementSpaceAvailable() TF_EXCLUSIVE_LOCKS_REQUIRED(mu_) {
+    bool ElementSpaceAvailable() TF_EXCLUSIVE_LOCKS_REQUIRED(*mu_) {
       // When doing round-robin reads, outstanding requests pre-allocate a
       // result in `results_`, so we only need to check the size of `results_`.
       if (StrictRoundRobin()) {
-        return results_.size() < max_outstanding_requests_;
+        return results_.size() < MaxOutstandingRequests();
       }
       // Otherwise, results aren't added to `results_` until the data has been
       // successfully retrieved. We need to count requests already added to
       // `results_` as well as in-progress requests.
-      return results_.size() + outstanding_requests_ <
-             max_outstanding_requests_;
+      return results_.size() + outstanding_requests_ < MaxOutstandingRequests();
     }
 
     bool StrictRoundRobin() const {
@@ -938,61 +1244,81 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
 
     const int64 iterator_index_;
 
-    mutable mutex mu_;
-    condition_variable get_next_cv_ TF_GUARDED_BY(mu_);
-    condition_variable worker_thread_cv_ TF_GUARDED_BY(mu_);
-    condition_variable manager_thread_cv_ TF_GUARDED_BY(mu_);
-    bool cancelled_ TF_GUARDED_BY(mu_) = false;
+    // The mutex and worker thread condition variable are shared with
+    // `autotuned_max_outstanding_requests_`, so that the autotuning model wakes
+    // up the worker threads when it raises the limit on outstanding requests.
+    const std::shared_ptr<mutex> mu_;
+    condition_variable get_next_cv_ TF_GUARDED_BY(*mu_);
+    const std::shared_ptr<condition_variable> worker_thread_cv_;
+    condition_variable manager_thread_cv_ TF_GUARDED_BY(*mu_);
+    bool cancelled_ TF_GUARDED_BY(*mu_) = false;
     // Method for deregistering the cancellation callback.
     std::function<void()> deregister_fn_;
 
-    int64 outstanding_requests_ TF_GUARDED_BY(mu_) = 0;
-    // max_outstanding_requests controls how many elements may be held in memory
-    // at the same time. This count includes both in-progress requests for
-    // elements as well as completed requests which haven't yet been produced.
-    int64 max_outstanding_requests_ TF_GUARDED_BY(mu_);
+    int64 outstanding_requests_ TF_GUARDED_BY(*mu_) = 0;
+    // When max_outstanding_requests is autotuned, the autotuning model adjusts
+    // how many requests may be outstanding. The limit controls how many
+    // elements may be held in memory at the same time, counting both
+    // in-progress requests and completed requests which haven't yet been
+    // produced.
+    const std::shared_ptr<model::SharedState>
+        autotuned_max_outstanding_requests_;
+    // When max_outstanding_requests is autotuned, the model node recording the
+    // time worker threads spend fetching elements, and the model it belongs
+    // to. Set in `Initialize`.
+    std::shared_ptr<model::Model> model_;
+    std::shared_ptr<model::Node> fetch_node_;
 
     // The number of threads in `worker_threads_` which are still running.
-    int64 num_running_worker_threads_ TF_GUARDED_BY(mu_) = 0;
+    int64 num_running_worker_threads_ TF_GUARDED_BY(*mu_) = 0;
 
     // The index of the next task in `tasks_` to read from.
-    int64 next_task_index_ TF_GUARDED_BY(mu_) = 0;
+    int64 next_task_index_ TF_GUARDED_BY(*mu_) = 0;
 
     // The number tasks in the `tasks_` list that have reached end_of_sequence.
-    int64 finished_tasks_ TF_GUARDED_BY(mu_) = 0;
+    int64 finished_tasks_ TF_GUARDED_BY(*mu_) = 0;
 
     // List of tasks to read from.
-    std::vector<std::shared_ptr<Task>> tasks_ TF_GUARDED_BY(mu_);
+    std::vector<std::shared_ptr<Task>> tasks_ TF_GUARDED_BY(*mu_);
 
     // The current round robin round we are engaged in. A round involves reading
     // from each task once.
-    int64 current_round_ TF_GUARDED_BY(mu_) = 0;
+    int64 current_round_ TF_GUARDED_BY(*mu_) = 0;
 
     // Maximum round robin round to read up to before blocking, not inclusive.
     // INVARIANT: current_round_ <= round_robin_round_limit_.
     //            If current_round_ == round_robin_round_limit_,
     //            next_task_index_ must be 0.
-    absl::optional<int64> round_robin_round_limit_ TF_GUARDED_BY(mu_);
+    absl::optional<int64> round_robin_round_limit_ TF_GUARDED_BY(*mu_);
 
     // A status to be returned from the next call to `GetNext`. This is set by
     // asynchronous threads when they encounter errors.
-    Status status_ TF_GUARDED_BY(mu_) = Status::OK();
+    Status status_ TF_GUARDED_BY(*mu_) = Status::OK();
     // A queue of results for `GetElement` requests to read from. When doing
     // strict round robin reads, the queue will contain placeholder results with
     // their `Result::ready` field false until their data has been retrieved
     // from a worker. When not doing round-robin reads, results are only added
     // to the queue after they are ready, to avoid head-of-line blocking.
-    std::queue<Result> results_ TF_GUARDED_BY(mu_);
+    std::queue<Result> results_ TF_GUARDED_BY(*mu_);
 
     bool initialized_ = false;
     // Set once in Initialize().
     int64 job_client_id_;
+    // Whether to uncompress elements. Set once in Initialize() when the
+    // dataset's `uncompress` attr is set.
+    bool uncompress_ = false;
+    // Thread pool for uncompressing elements, created in Initialize() when
+    // `uncompress_` is set.
+    std::unique_ptr<thread::ThreadPool> uncompress_pool_;
+    // The number of elements scheduled on `uncompress_pool_` which haven't
+    // been uncompressed yet.
+    int64 num_pending_uncompressions_ TF_GUARDED_BY(*mu_) = 0;
     std::unique_ptr<DataServiceDispatcherClient> dispatcher_;
-    int64 get_next_index_ TF_GUARDED_BY(mu_) = 0;
+    int64 get_next_index_ TF_GUARDED_BY(*mu_) = 0;
 
     bool job_finished_ = false;
-    std::vector<std::unique_ptr<Thread>> worker_threads_ TF_GUARDED_BY(mu_);
-    std::unique_ptr<Thread> task_thread_manager_ TF_GUARDED_BY(mu_);
+    std::vector<std::unique_ptr<Thread>> worker_threads_ TF_GUARDED_BY(*mu_);
+    std::unique_ptr<Thread> task_thread_manager_ TF_GUARDED_BY(*mu_);
   };
 
   const int op_version_;
@@ -1007,6 +1333,7 @@ class DataServiceDatasetOp::Dataset : public DatasetBase {
   const int64 max_outstanding_requests_;
   const int64 task_refresh_interval_ms_;
   const TargetWorkers target_workers_;
+  const bool uncompress_;
   IterationCounter* const iteration_counter_;  // Owned
   const bool owns_resource_;
   const ResourceHandle iteration_counter_handle_;
@@ -1044,6 +1371,10 @@ DataServiceDatasetOp::DataServiceDatasetOp(OpKernelConstruction* ctx)
     data_transfer_protocol_ = kLocalTransferProtocol;
   }
 
+  if (ctx->HasAttr(kUncompress)) {
+    OP_REQUIRES_OK(ctx, ctx->GetAttr(kUncompress, &uncompress_));
+  }
+
   auto& op_name = ctx->def().op();
   if (op_name == kDataServiceDatasetV1) {
     op_version_ = 1;
@@ -1142,8 +1473,8 @@ void DataServiceDatasetOp::MakeDataset(OpKernelContext* ctx,
       ctx, op_version_, dataset_id, processing_mode, address, protocol,
       data_transfer_protocol_, job_name, consumer_index, num_consumers,
       max_outstanding_requests, task_refresh_interval_hint_ms_, target_workers_,
-      iteration_counter, owns_resource, iteration_counter_handle, output_types_,
-      output_shapes_);
+      uncompress_, iteration_counter, owns_resource, iteration_counter_handle,
+      output_types_, output_shapes_);
 }
 
 REGISTER_KERNEL_BUILDER(Name("DataServiceDataset").Device(DEVICE_CPU),
@@ -69,6 +69,7 @@ class DataServiceDatasetOp : public DatasetOpKernel {
   static constexpr const char* const kTaskRefreshIntervalHintMs =
       "task_refresh_interval_hint_ms";
   static constexpr const char* const kTargetWorkers = "target_workers";
+  static constexpr const char* const kUncompress = "uncompress";
   static constexpr const char* const kIterationCounter = "iteration_counter";
   static constexpr const char* const kOutputTypes = "output_types";
   static constexpr const char* const kOutputShapes = "output_shapes";
@@ -89,6 +90,7 @@ class DataServiceDatasetOp : public DatasetOpKernel {
   std::vector<PartialTensorShape> output_shapes_;
   std::string data_transfer_protocol_;
   TargetWorkers target_workers_ = TargetWorkers::AUTO;
+  bool uncompress_ = false;
 };
 
 }  // namespace data
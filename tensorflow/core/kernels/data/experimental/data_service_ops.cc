@@ -15,6 +15,7 @@ limitations under the License.
 
 #include "tensorflow/core/kernels/data/experimental/data_service_ops.h"
 
+#include <string>
 #include <utility>
 
 #include "tensorflow/core/data/dataset_utils.h"
@@ -34,7 +35,68 @@ namespace data {
 
 namespace {
 const int64 kRetryTimeoutMicros = 1000LL * 1000 * 60 * 60;  // 60 minutes.
+
+// Parses the dispatcher address and protocol inputs shared by the
+// registration ops.
+Status ParseDispatcherArguments(OpKernelContext* ctx, tstring& address,
+                                tstring& protocol) {
+  TF_RETURN_IF_ERROR(
+      ParseScalarArgument(ctx, RegisterDatasetOp::kAddress, &address));
+  if (address.empty()) {
+    return errors::InvalidArgument(RegisterDatasetOp::kAddress,
+                                   " must be non-empty.");
+  }
+  TF_RETURN_IF_ERROR(
+      ParseScalarArgument(ctx, RegisterDatasetOp::kProtocol, &protocol));
+  if (protocol.empty()) {
+    return errors::InvalidArgument(RegisterDatasetOp::kProtocol,
+                                   " must be non-empty.");
+  }
+  return Status::OK();
+}
+
+// Serializes `dataset` into the `DatasetDef` sent to the dispatcher.
+Status SerializeDataset(
+    OpKernelContext* ctx, DatasetBase* dataset,
+    SerializationContext::ExternalStatePolicy external_state_policy,
+    DatasetDef& dataset_def) {
+  SerializationContext::Params params(ctx);
+  params.external_state_policy = external_state_policy;
+  SerializationContext serialization_ctx(params);
+  Status s = AsGraphDef(ctx, dataset, std::move(serialization_ctx),
+                        dataset_def.mutable_graph());
+  if (!s.ok()) {
+    return errors::FailedPrecondition(
+        "Serialization error while trying to register a dataset with "
+        "tf.data service. "
+        "The dataset may depend on a resource located on a different "
+        "device. "
+        "To address this, call `register_dataset` from the device with the "
+        "resource, then use `from_dataset_id` to create per-device "
+        "datasets. "
+        "Original error: ",
+        s);
+  }
+  return Status::OK();
+}
+
+// Parses the value of a compression attr into a `DatasetCompression`.
+Status ParseCompression(const std::string& compression_str,
+                        DatasetCompression& compression) {
+  if (compression_str.empty()) {
+    compression = COMPRESSION_UNSPECIFIED;
+  } else if (compression_str == "NONE") {
+    compression = COMPRESSION_NONE;
+  } else if (compression_str == "SNAPPY") {
+    compression = COMPRESSION_SNAPPY;
+  } else {
+    return errors::InvalidArgument(
+        "Unrecognized compression: ", compression_str,
+        ". Must be one of \"NONE\" or \"SNAPPY\".");
+  }
+  return Status::OK();
 }
+}  // namespace
 
 RegisterDatasetOp::RegisterDatasetOp(OpKernelConstruction* ctx)
     : OpKernel(ctx) {
@@ -49,6 +111,12 @@ RegisterDatasetOp::RegisterDatasetOp(OpKernelConstruction* ctx)
     OP_REQUIRES_OK(ctx, ctx->GetAttr(kElementSpec, &element_spec));
     element_spec_.emplace(element_spec);
   }
+
+  if (ctx->HasAttr(kCompression)) {
+    tstring compression;
+    OP_REQUIRES_OK(ctx, ctx->GetAttr(kCompression, &compression));
+    OP_REQUIRES_OK(ctx, ParseCompression(compression, compression_));
+  }
 }
 
 void RegisterDatasetOp::Compute(OpKernelContext* ctx) {
@@ -56,35 +124,12 @@ void RegisterDatasetOp::Compute(OpKernelContext* ctx) {
   OP_REQUIRES_OK(ctx, GetDatasetFromVariantTensor(ctx->input(0), &dataset));
 
   tstring address;
-  OP_REQUIRES_OK(ctx, ParseScalarArgument(ctx, kAddress, &address));
-  OP_REQUIRES(ctx, !address.empty(),
-              errors::InvalidArgument(kAddress, " must be non-empty."));
-
   tstring protocol;
-  OP_REQUIRES_OK(ctx, ParseScalarArgument(ctx, kProtocol, &protocol));
-  OP_REQUIRES(ctx, !protocol.empty(),
-              errors::InvalidArgument(kProtocol, " must be non-empty."));
+  OP_REQUIRES_OK(ctx, ParseDispatcherArguments(ctx, address, protocol));
 
-  SerializationContext::Params params(ctx);
-  params.external_state_policy = external_state_policy_;
-  SerializationContext serialization_ctx(params);
   DatasetDef dataset_def;
-  Status s = AsGraphDef(ctx, dataset, std::move(serialization_ctx),
-                        dataset_def.mutable_graph());
-  if (!s.ok()) {
-    OP_REQUIRES_OK(
-        ctx,
-        errors::FailedPrecondition(
-            "Serialization error while trying to register a dataset with "
-            "tf.data service. "
-            "The dataset may depend on a resource located on a different "
-            "device. "
-            "To address this, call `register_dataset` from the device with the "
-            "resource, then use `from_dataset_id` to create per-device "
-            "datasets. "
-            "Original error: ",
-            s));
-  }
+  OP_REQUIRES_OK(ctx, SerializeDataset(ctx, dataset, external_state_policy_,
+                                       dataset_def));
 
   DataServiceDispatcherClient client(address, protocol);
   int64 dataset_id;
@@ -93,7 +138,7 @@ void RegisterDatasetOp::Compute(OpKernelContext* ctx) {
       ctx, grpc_util::Retry(
                [&]() {
                  return client.RegisterDataset(dataset_def, element_spec_,
-                                               dataset_id);
+                                               compression_, dataset_id);
                },
                /*description=*/
                strings::StrCat("register dataset with dispatcher at ", address),
@@ -105,8 +150,109 @@ void RegisterDatasetOp::Compute(OpKernelContext* ctx) {
   output_dataset_id() = dataset_id;
 }
 
+RegisterDatasetsOp::RegisterDatasetsOp(OpKernelConstruction* ctx)
+    : OpKernel(ctx) {
+  std::vector<int64> external_state_policies;
+  OP_REQUIRES_OK(
+      ctx, ctx->GetAttr(kExternalStatePolicies, &external_state_policies));
+  for (int64 external_state_policy : external_state_policies) {
+    external_state_policies_.push_back(
+        SerializationContext::ExternalStatePolicy(external_state_policy));
+  }
+
+  std::vector<tstring> element_specs;
+  OP_REQUIRES_OK(ctx, ctx->GetAttr(kElementSpecs, &element_specs));
+  if (element_specs.empty()) {
+    element_specs_.resize(external_state_policies_.size());
+  } else {
+    OP_REQUIRES(ctx, element_specs.size() == external_state_policies_.size(),
+                errors::InvalidArgument(
+                    kElementSpecs, " must be empty or have one entry per "
+                    "dataset, but got ", element_specs.size(), " entries for ",
+                    external_state_policies_.size(), " datasets."));
+    for (const tstring& element_spec : element_specs) {
+      if (!element_spec.empty()) {
+        element_specs_.emplace_back(element_spec);
+      } else {
+        element_specs_.emplace_back();
+      }
+    }
+  }
+
+  std::vector<tstring> compressions;
+  OP_REQUIRES_OK(ctx, ctx->GetAttr(kCompressions, &compressions));
+  if (compressions.empty()) {
+    compressions_.resize(external_state_policies_.size(),
+                         COMPRESSION_UNSPECIFIED);
+  } else {
+    OP_REQUIRES(ctx, compressions.size() == external_state_policies_.size(),
+                errors::InvalidArgument(
+                    kCompressions, " must be empty or have one entry per "
+                    "dataset, but got ", compressions.size(), " entries for ",
+                    external_state_policies_.size(), " datasets."));
+    for (const tstring& compression_str : compressions) {
+      DatasetCompression compression;
+      OP_REQUIRES_OK(ctx, ParseCompression(compression_str, compression));
+      compressions_.push_back(compression);
+    }
+  }
+}
+
+void RegisterDatasetsOp::Compute(OpKernelContext* ctx) {
+  OpInputList datasets;
+  OP_REQUIRES_OK(ctx, ctx->input_list(kDatasets, &datasets));
+  OP_REQUIRES(
+      ctx, datasets.size() == external_state_policies_.size(),
+      errors::InvalidArgument(kExternalStatePolicies,
+                              " must have one entry per dataset, but got ",
+                              external_state_policies_.size(), " entries for ",
+                              datasets.size(), " datasets."));
+
+  tstring address;
+  tstring protocol;
+  OP_REQUIRES_OK(ctx, ParseDispatcherArguments(ctx, address, protocol));
+
+  std::vector<DatasetDef> dataset_defs(datasets.size());
+  for (int i = 0; i < datasets.size(); ++i) {
+    DatasetBase* dataset;
+    OP_REQUIRES_OK(ctx, GetDatasetFromVariantTensor(datasets[i], &dataset));
+    OP_REQUIRES_OK(ctx, SerializeDataset(ctx, dataset,
+                                         external_state_policies_[i],
+                                         dataset_defs[i]));
+  }
+
+  DataServiceDispatcherClient client(address, protocol);
+  std::vector<int64> dataset_ids;
+  int64 deadline_micros = EnvTime::NowMicros() + kRetryTimeoutMicros;
+  OP_REQUIRES_OK(
+      ctx, grpc_util::Retry(
+               [&]() {
+                 return client.RegisterDatasets(dataset_defs, element_specs_,
+                                                compressions_, dataset_ids);
+               },
+               /*description=*/
+               strings::StrCat("register datasets with dispatcher at ",
+                               address),
+               deadline_micros));
+  OP_REQUIRES(ctx, dataset_ids.size() == datasets.size(),
+              errors::Internal("Dispatcher returned ", dataset_ids.size(),
+                               " dataset ids for ", datasets.size(),
+                               " datasets."));
+
+  Tensor* output;
+  OP_REQUIRES_OK(ctx, ctx->allocate_output(
+                          0, TensorShape{static_cast<int64>(datasets.size())},
+                          &output));
+  auto output_dataset_ids = output->vec<int64>();
+  for (int i = 0; i < dataset_ids.size(); ++i) {
+    output_dataset_ids(i) = dataset_ids[i];
+  }
+}
+
 REGISTER_KERNEL_BUILDER(Name("RegisterDataset").Device(DEVICE_CPU),
                         RegisterDatasetOp);
+REGISTER_KERNEL_BUILDER(Name("RegisterDatasets").Device(DEVICE_CPU),
+                        RegisterDatasetsOp);
 
 }  // namespace data
 }  // namespace tensorflow
@@ -16,6 +16,10 @@ limitations under the License.
 #ifndef TENSORFLOW_CORE_KERNELS_DATA_EXPERIMENTAL_DATA_SERVICE_OPS_H_
 #define TENSORFLOW_CORE_KERNELS_DATA_EXPERIMENTAL_DATA_SERVICE_OPS_H_
 
+#include <string>
+#include <vector>
+
+#include "tensorflow/core/data/service/common.pb.h"
 #include "tensorflow/core/framework/dataset.h"
 #include "tensorflow/core/framework/op_kernel.h"
 #include "tensorflow/core/kernels/data/iterator_ops.h"
@@ -28,6 +32,8 @@ namespace data {
 // The address and protocol inputs are used to connect to the dispatcher.
 // The external state policy attribute determines whether to ignore, warn, or
 // error out when the dataset contains external state.
+// The compression attribute records how the dataset's elements are compressed:
+// "NONE", "SNAPPY", or "" if unspecified.
 // The op produces a dataset id for identifying the registered dataset.
 class RegisterDatasetOp : public OpKernel {
  public:
@@ -36,6 +42,7 @@ class RegisterDatasetOp : public OpKernel {
   static constexpr const char* const kExternalStatePolicy =
       "external_state_policy";
   static constexpr const char* const kElementSpec = "element_spec";
+  static constexpr const char* const kCompression = "compression";
   static constexpr const char* const kTimeoutMs = "timeout_ms";
 
   explicit RegisterDatasetOp(OpKernelConstruction* ctx);
@@ -45,6 +52,34 @@ class RegisterDatasetOp : public OpKernel {
  private:
   SerializationContext::ExternalStatePolicy external_state_policy_;
   absl::optional<std::string> element_spec_;
+  DatasetCompression compression_ = COMPRESSION_UNSPECIFIED;
+};
+
+// Registers multiple datasets with the tf.data service in a single request to
+// the dispatcher.
+//
+// Behaves like running a `RegisterDatasetOp` per dataset, with per-dataset
+// external state policies, element specs, and compressions. An empty element
+// spec means the dataset has no element spec. Empty `element_specs` or
+// `compressions` lists leave them unspecified for every dataset. The op
+// produces a vector with the dataset id of each input dataset.
+class RegisterDatasetsOp : public OpKernel {
+ public:
+  static constexpr const char* const kDatasets = "datasets";
+  static constexpr const char* const kExternalStatePolicies =
+      "external_state_policies";
+  static constexpr const char* const kElementSpecs = "element_specs";
+  static constexpr const char* const kCompressions = "compressions";
+
+  explicit RegisterDatasetsOp(OpKernelConstruction* ctx);
+
+  void Compute(OpKernelContext* ctx) override;
+
+ private:
+  std::vector<SerializationContext::ExternalStatePolicy>
+      external_state_policies_;
+  std::vector<absl::optional<std::string>> element_specs_;
+  std::vector<DatasetCompression> compressions_;
 };
 
 }  // namespace data
@@ -1241,6 +1241,7 @@ REGISTER_OP("DataServiceDatasetV2")
     .Attr("output_shapes: list(shape) >= 1")
     .Attr("data_transfer_protocol: string = ''")
     .Attr("target_workers: string = 'AUTO'")
+    .Attr("uncompress: bool = false")
     .SetIsStateful()
     .SetShapeFn(shape_inference::ScalarShape);
 
@@ -1251,8 +1252,25 @@ REGISTER_OP("RegisterDataset")
     .Output("dataset_id: int64")
     .Attr("external_state_policy: int")
     .Attr("element_spec: string = ''")
+    .Attr("compression: string = ''")
     .SetShapeFn(shape_inference::ScalarShape);
 
+REGISTER_OP("RegisterDatasets")
+    .Input("datasets: N * variant")
+    .Input("address: string")
+    .Input("protocol: string")
+    .Output("dataset_ids: int64")
+    .Attr("N: int >= 1")
+    .Attr("external_state_policies: list(int)")
+    .Attr("element_specs: list(string) = []")
+    .Attr("compressions: list(string) = []")
+    .SetShapeFn([](shape_inference::InferenceContext* c) {
+      int64 n;
+      TF_RETURN_IF_ERROR(c->GetAttr("N", &n));
+      c->set_output(0, c->Vector(n));
+      return Status::OK();
+    });
+
 REGISTER_OP("InitializeTableFromDataset")
     .Input("table_handle: resource")
     .Input("dataset: variant")
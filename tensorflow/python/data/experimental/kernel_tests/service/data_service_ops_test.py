@@ -17,12 +17,15 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
 import time
 
 from absl.testing import parameterized
 
+from tensorflow.python.compat import compat
 from tensorflow.python.data.experimental.kernel_tests.service import test_base as data_service_test_base
 from tensorflow.python.data.experimental.ops import batching
+from tensorflow.python.data.experimental.ops import compression_ops
 from tensorflow.python.data.experimental.ops import data_service_ops
 from tensorflow.python.data.experimental.ops import distribute_options
 from tensorflow.python.data.experimental.ops import grouping
@@ -34,11 +37,13 @@ from tensorflow.python.framework import combinations
 from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import errors
+from tensorflow.python.framework import ops
 from tensorflow.python.framework import random_seed
 from tensorflow.python.framework import sparse_tensor
 from tensorflow.python.framework import tensor_spec
 from tensorflow.python.framework import tensor_util
 from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import io_ops
 from tensorflow.python.ops import lookup_ops
 from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import random_ops
@@ -56,6 +61,37 @@ NO_WORK_DIR = data_service_test_base.NO_WORK_DIR
 class DataServiceOpsTest(data_service_test_base.TestBase,
                          parameterized.TestCase):
 
+  def _makeTransferredDataset(self, cluster, dataset, compression, compressed):
+    """Reads `dataset`'s elements in the form the tf.data service sends them.
+
+    If `compressed` is true, the elements are uncompressed with a separate map,
+    which fails if they were not compressed. Otherwise, reading fails if they
+    were compressed.
+
+    Args:
+      cluster: The `TestCluster` to register `dataset` with.
+      dataset: The dataset to register.
+      compression: The compression to register `dataset` with.
+      compressed: Whether the elements are expected to be compressed.
+
+    Returns:
+      A dataset producing the elements of `dataset`.
+    """
+    # pylint: disable=protected-access
+    dataset_id = data_service_ops._register_dataset(
+        cluster.dispatcher_address(), dataset, compression=compression)
+    element_spec = dataset.element_spec
+    transferred = data_service_ops._from_dataset_id(
+        "parallel_epochs",
+        cluster.dispatcher_address(),
+        dataset_id,
+        (data_service_ops._SCALAR_VARIANT_SPEC if compressed else element_spec),
+        compression=None)
+    if compressed:
+      transferred = transferred.map(
+          lambda x: compression_ops.uncompress(x, output_spec=element_spec))
+    return transferred
+
   @combinations.generate(
       combinations.times(test_base.default_test_combinations(),
                          data_service_test_base.all_cluster_configurations()))
@@ -78,6 +114,93 @@ class DataServiceOpsTest(data_service_test_base.TestBase,
         num_elements, cluster, compression=compression)
     self.assertDatasetProduces(ds, list(range(num_elements)))
 
+  @combinations.generate(
+      combinations.times(
+          test_base.default_test_combinations(),
+          combinations.combine(compression=[None, "AUTO"]),
+          combinations.combine(data_transfer_protocol=[None, "grpc+stream"])))
+  def testDistributeLargeElementsCompression(self, compression,
+                                             data_transfer_protocol):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+    num_elements = 10
+    # Large enough for "AUTO" to compress the elements.
+    elements = dataset_ops.Dataset.range(num_elements).map(
+        lambda x: array_ops.fill([1024], x))
+    ds = self.make_distributed_dataset(
+        elements,
+        cluster,
+        data_transfer_protocol=data_transfer_protocol,
+        compression=compression)
+    expected = [[i] * 1024 for i in range(num_elements)]
+    self.assertDatasetProduces(ds, expected)
+    transferred = self._makeTransferredDataset(
+        cluster, elements, compression, compressed=compression == "AUTO")
+    self.assertDatasetProduces(transferred, expected)
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testAutoCompressionSkipsSmallElements(self):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+    num_elements = 10
+    small = dataset_ops.Dataset.range(num_elements)
+    large = small.map(lambda x: array_ops.fill([1024], x))
+    # Past the horizon, the compression is recorded with the dispatcher and
+    # readers only uncompress compressed datasets.
+    with compat.forward_compatibility_horizon(2021, 8, 6):
+      small_transferred = self._makeTransferredDataset(
+          cluster, small, "AUTO", compressed=False)
+      large_transferred = self._makeTransferredDataset(
+          cluster, large, "AUTO", compressed=True)
+      dataset_id = data_service_ops.register_dataset(
+          cluster.dispatcher_address(), small)
+      from_dataset_id_ds = data_service_ops.from_dataset_id(
+          "parallel_epochs", cluster.dispatcher_address(), dataset_id,
+          small.element_spec)
+    self.assertDatasetProduces(small_transferred, list(range(num_elements)))
+    self.assertDatasetProduces(large_transferred,
+                               [[i] * 1024 for i in range(num_elements)])
+    self.assertDatasetProduces(from_dataset_id_ds, list(range(num_elements)))
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testDistributeUncompressInDataServiceDataset(self):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+    num_elements = 10
+    ds = dataset_ops.Dataset.range(num_elements).map(
+        lambda x: array_ops.fill([1024], x))
+    # Past the horizon, the data service dataset uncompresses elements itself.
+    with compat.forward_compatibility_horizon(2021, 8, 6):
+      ds = self.make_distributed_dataset(ds, cluster, compression="AUTO")
+    self.assertDatasetProduces(ds, [[i] * 1024 for i in range(num_elements)])
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testUncompressInDataServiceDatasetWrongElementSpec(self):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+    ds = dataset_ops.Dataset.range(10).map(lambda x: array_ops.fill([1024], x))
+    wrong_spec = tensor_spec.TensorSpec(shape=[1024], dtype=dtypes.int32)
+    with compat.forward_compatibility_horizon(2021, 8, 6):
+      dataset_id = data_service_ops.register_dataset(
+          cluster.dispatcher_address(), ds)
+      from_dataset_id_ds = data_service_ops.from_dataset_id(
+          "parallel_epochs", cluster.dispatcher_address(), dataset_id,
+          wrong_spec)
+    with self.assertRaisesRegex(errors.FailedPreconditionError,
+                                "Expected a tensor of type int32"):
+      self.evaluate(self.getNext(from_dataset_id_ds)())
+
+  @combinations.generate(
+      combinations.times(test_base.default_test_combinations(),
+                         combinations.combine(compression=[None, "AUTO"])))
+  def testDistributeGrpcStreamTransferProtocol(self, compression):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+    num_elements = 10
+    ds = dataset_ops.Dataset.range(num_elements)
+    ds = ds.apply(
+        data_service_ops._distribute(  # pylint: disable=protected-access
+            processing_mode="parallel_epochs",
+            service=cluster.dispatcher_address(),
+            data_transfer_protocol="grpc+stream",
+            compression=compression))
+    self.assertDatasetProduces(ds, list(range(num_elements)))
+
   @combinations.generate(test_base.default_test_combinations())
   def testDistributeInvalidCompression(self):
     cluster = data_service_test_base.TestCluster(num_workers=1)
@@ -230,6 +353,50 @@ class DataServiceOpsTest(data_service_test_base.TestBase,
     self.assertDatasetProduces(
         ds, num_workers * list(range(num_elements)), assert_items_equal=True)
 
+  @combinations.generate(
+      combinations.times(test_base.default_test_combinations(),
+                         combinations.combine(ram_budget=[None, 1])))
+  def testAutotuneMaxOutstandingRequests(self, ram_budget):
+    num_workers = 3
+    cluster = data_service_test_base.TestCluster(num_workers=num_workers)
+    num_elements = 100
+    # `None` autotunes the total number of outstanding requests.
+    ds = self.make_distributed_range_dataset(
+        num_elements, cluster, max_outstanding_requests=None)
+    # Slow down the consumer so that the autotuning model runs while elements
+    # are still outstanding from all tasks.
+    ds = ds.apply(testing.sleep(1000))
+    options = dataset_ops.Options()
+    options.experimental_optimization.autotune = True
+    if ram_budget is not None:
+      # A RAM budget below the size of one element keeps the limit at its
+      # minimum of one outstanding request per task, which must still read
+      # from every task.
+      options.experimental_optimization.autotune_ram_budget = ram_budget
+    ds = ds.with_options(options)
+    self.assertDatasetProduces(
+        ds, num_workers * list(range(num_elements)), assert_items_equal=True)
+
+  @combinations.generate(test_base.eager_only_combinations())
+  def testStartFetchingOnIteratorCreation(self):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+    marker = os.path.join(self.get_temp_dir(), "started_producing")
+
+    def write_marker(x):
+      with ops.control_dependencies([io_ops.write_file(marker, "")]):
+        return array_ops.identity(x)
+
+    # Workers only start producing a task's elements once a consumer requests
+    # one, so the marker shows that the iterator has sent a request.
+    ds = dataset_ops.Dataset.range(10).map(write_marker)
+    ds = self.make_distributed_dataset(ds, cluster)
+    it = iter(ds)
+    # Without a job name, the iterator requests elements as soon as it is
+    # created, before the first `next` call.
+    while not os.path.exists(marker):
+      time.sleep(0.1)
+    self.assertEqual(next(it).numpy(), 0)
+
   @combinations.generate(test_base.eager_only_combinations())
   def testInsideFunction(self):
     num_workers = 3
@@ -580,6 +747,34 @@ class DataServiceOpsTest(data_service_test_base.TestBase,
         ds.element_spec)
     self.assertDatasetProduces(from_dataset_id_ds, list(range(num_elements)))
 
+  @combinations.generate(test_base.default_test_combinations())
+  def testRegisterDatasets(self):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+
+    datasets = [dataset_ops.Dataset.range(i + 5) for i in range(3)]
+    compressions = ["AUTO", None, "AUTO"]
+    # pylint: disable=protected-access
+    dataset_ids = data_service_ops._register_datasets(
+        cluster.dispatcher_address(), datasets, compressions)
+    for i, ds in enumerate(datasets):
+      from_dataset_id_ds = data_service_ops._from_dataset_id(
+          "parallel_epochs",
+          cluster.dispatcher_address(),
+          dataset_ids[i],
+          ds.element_spec,
+          compression=compressions[i])
+      self.assertDatasetProduces(from_dataset_id_ds, list(range(i + 5)))
+    # pylint: enable=protected-access
+
+  @combinations.generate(test_base.default_test_combinations())
+  def testRegisterDatasetsWrongNumberOfCompressions(self):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+    datasets = [dataset_ops.Dataset.range(5) for _ in range(2)]
+    with self.assertRaisesRegex(ValueError,
+                                "compressions must have one entry per dataset"):
+      data_service_ops._register_datasets(  # pylint: disable=protected-access
+          cluster.dispatcher_address(), datasets, ["AUTO"])
+
   @combinations.generate(test_base.default_test_combinations())
   def testFromDatasetIdSharedJobs(self):
     cluster = data_service_test_base.TestCluster(num_workers=2)
@@ -657,6 +852,23 @@ class DataServiceOpsTest(data_service_test_base.TestBase,
                                 "Expected a tensor of type variant"):
       self.evaluate(self.getNext(from_dataset_id_ds)())
 
+  @combinations.generate(test_base.default_test_combinations())
+  def testFromDatasetIdWrongElementSpecRecordedCompression(self):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+
+    num_elements = 10
+    ds = dataset_ops.Dataset.range(num_elements)
+    wrong_spec = tensor_spec.TensorSpec(shape=(), dtype=dtypes.variant)
+    with compat.forward_compatibility_horizon(2021, 8, 6):
+      dataset_id = data_service_ops.register_dataset(
+          cluster.dispatcher_address(), ds)
+      from_dataset_id_ds = data_service_ops.from_dataset_id(
+          "parallel_epochs", cluster.dispatcher_address(), dataset_id,
+          wrong_spec)
+    with self.assertRaisesRegex(errors.FailedPreconditionError,
+                                "Expected a tensor of type variant"):
+      self.evaluate(self.getNext(from_dataset_id_ds)())
+
   @combinations.generate(test_base.default_test_combinations())
   def testFromDatasetIdNotRegistered(self):
     cluster = data_service_test_base.TestCluster(num_workers=1)
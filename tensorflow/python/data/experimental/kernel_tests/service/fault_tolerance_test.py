@@ -220,16 +220,20 @@ class FaultToleranceTest(data_service_test_base.TestBase,
     self.assertCountEqual(2 * list(range(num_elements)), results)
 
   @combinations.generate(
-      combinations.times(test_base.eager_only_combinations(),
-                         combinations.combine(use_same_port=[True, False]),
-                         data_service_test_base.all_cluster_configurations()))
-  def testRestartWorker(self, use_same_port, work_dir, fault_tolerant_mode):
+      combinations.times(
+          test_base.eager_only_combinations(),
+          combinations.combine(use_same_port=[True, False]),
+          combinations.combine(data_transfer_protocol=[None, "grpc+stream"]),
+          data_service_test_base.all_cluster_configurations()))
+  def testRestartWorker(self, use_same_port, data_transfer_protocol, work_dir,
+                        fault_tolerant_mode):
     cluster = data_service_test_base.TestCluster(
         num_workers=1,
         work_dir=work_dir,
         fault_tolerant_mode=fault_tolerant_mode)
     num_elements = 100
-    ds = self.make_distributed_range_dataset(num_elements, cluster)
+    ds = self.make_distributed_range_dataset(
+        num_elements, cluster, data_transfer_protocol=data_transfer_protocol)
     iterator = iter(ds)
     # Read halfway through the dataset.
     midpoint = num_elements // 2
@@ -253,6 +257,31 @@ class FaultToleranceTest(data_service_test_base.TestBase,
       val = next(iterator).numpy()
       self.assertEqual(i, val)
 
+  @combinations.generate(test_base.eager_only_combinations())
+  def testStopWorkerWithIdleElementStream(self):
+    cluster = data_service_test_base.TestCluster(num_workers=1)
+    num_elements = 100
+    ds = self.make_distributed_range_dataset(
+        num_elements,
+        cluster,
+        max_outstanding_requests=1,
+        data_transfer_protocol="grpc+stream")
+    iterator = iter(ds)
+    self.assertEqual(0, next(iterator).numpy())
+    # Wait for the iterator to fill its buffer, leaving its element stream
+    # idle. Stopping the worker must not wait for the stream to close.
+    time.sleep(0.5)
+    cluster.workers[0].stop()
+
+    cluster.workers[0].restart()
+    # Elements buffered before the worker stopped may still be returned.
+    while True:
+      val = next(iterator).numpy()
+      if val == 0:
+        break
+    for i in range(1, num_elements // 2):
+      self.assertEqual(i, next(iterator).numpy())
+
   @combinations.generate(test_base.eager_only_combinations())
   def testChangeProcessingModeAfterRestart(self):
     self.skipTest("b/170910141")
@@ -219,6 +219,7 @@ class TestBase(test_base.DatasetTestBase):
                                consumer_index=None,
                                num_consumers=None,
                                max_outstanding_requests=None,
+                               data_transfer_protocol=None,
                                compression="AUTO",
                                target_workers="AUTO"):
     # pylint: disable=protected-access
@@ -231,6 +232,7 @@ class TestBase(test_base.DatasetTestBase):
             num_consumers=num_consumers,
             max_outstanding_requests=max_outstanding_requests,
             task_refresh_interval_hint_ms=20,
+            data_transfer_protocol=data_transfer_protocol,
             compression=compression,
             target_workers=target_workers))
 
@@ -240,6 +242,7 @@ class TestBase(test_base.DatasetTestBase):
                                      processing_mode="parallel_epochs",
                                      job_name=None,
                                      max_outstanding_requests=None,
+                                     data_transfer_protocol=None,
                                      compression="AUTO",
                                      target_workers="AUTO"):
     dataset = dataset_ops.Dataset.range(num_elements)
@@ -249,6 +252,7 @@ class TestBase(test_base.DatasetTestBase):
         processing_mode=processing_mode,
         job_name=job_name,
         max_outstanding_requests=max_outstanding_requests,
+        data_transfer_protocol=data_transfer_protocol,
         compression=compression,
         target_workers=target_workers)
 
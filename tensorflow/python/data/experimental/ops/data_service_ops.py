@@ -19,8 +19,6 @@ from __future__ import print_function
 
 import functools
 
-import six
-
 from tensorflow.python import tf2
 from tensorflow.python.compat import compat
 from tensorflow.python.data.experimental.ops import compression_ops
@@ -29,6 +27,7 @@ from tensorflow.python.data.experimental.ops.distribute_options import ExternalS
 from tensorflow.python.data.experimental.service import _pywrap_server_lib
 from tensorflow.python.data.experimental.service import _pywrap_utils
 from tensorflow.python.data.ops import dataset_ops
+from tensorflow.python.data.util import nest
 from tensorflow.python.eager import context
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
@@ -41,6 +40,14 @@ from tensorflow.python.util.tf_export import tf_export
 
 COMPRESSION_AUTO = "AUTO"
 COMPRESSION_NONE = None
+# Data transfer protocols served by the worker's gRPC server. These support
+# transferring compressed elements.
+_GRPC_DATA_TRANSFER_PROTOCOLS = ("grpc", "grpc+stream")
+# With `COMPRESSION_AUTO`, elements estimated to be smaller than this are sent
+# uncompressed, since compressing them costs more than it saves.
+_AUTO_COMPRESSION_MIN_ELEMENT_BYTES = 4096
+# Spec of the compressed elements produced by the data service.
+_SCALAR_VARIANT_SPEC = tensor_spec.TensorSpec(shape=(), dtype=dtypes.variant)
 # TODO(b/176933539): Use the regular import.
 nested_structure_coder = lazy_loader.LazyLoader(
     "nested_structure_coder", globals(),
@@ -56,19 +63,62 @@ class ProcessingMode(object):
   @staticmethod
   def validate(mode):
     """Raises a ValueError if the given object is not a valid processing mode."""
-    valid_modes = [
-        ProcessingMode.PARALLEL_EPOCHS, ProcessingMode.DISTRIBUTED_EPOCH
-    ]
-    if mode not in valid_modes:
+    if mode not in _VALID_MODES:
       raise ValueError(
           "{0} is not a valid processing mode. Valid modes: {1}".format(
-              mode, valid_modes))
+              mode, sorted(_VALID_MODES)))
+
+
+_VALID_MODES = frozenset(
+    (ProcessingMode.PARALLEL_EPOCHS, ProcessingMode.DISTRIBUTED_EPOCH))
+_VALID_COMPRESSIONS = frozenset((COMPRESSION_AUTO, COMPRESSION_NONE))
+
+
+def _make_shared_job_options():
+  options = dataset_ops.Options()
+  options.experimental_distribute.auto_shard_policy = AutoShardPolicy.OFF
+  return options
+
+
+# Options applied to datasets reading from shared jobs. `with_options` only
+# reads these, so a single instance is reused.
+_SHARED_JOB_OPTIONS = _make_shared_job_options()
+
+
+def _should_compress(element_spec):
+  """Returns whether `COMPRESSION_AUTO` should compress the given elements.
+
+  Elements are left uncompressed when all their components are dense tensors
+  with static shapes adding up to less than
+  `_AUTO_COMPRESSION_MIN_ELEMENT_BYTES`.
+
+  Args:
+    element_spec: The element spec of the dataset to transfer.
+
+  Returns:
+    Whether to compress the dataset's elements.
+  """
+  num_bytes = 0
+  for spec in nest.flatten(element_spec):
+    if (not isinstance(spec, tensor_spec.TensorSpec) or
+        not spec.shape.is_fully_defined() or
+        spec.dtype in (dtypes.string, dtypes.variant, dtypes.resource)):
+      return True
+    num_bytes += spec.shape.num_elements() * spec.dtype.size
+  return num_bytes >= _AUTO_COMPRESSION_MIN_ELEMENT_BYTES
+
+
+def _check_compression(compression):
+  if compression not in _VALID_COMPRESSIONS:
+    raise ValueError(
+        "Invalid compression argument: {}. Must be one of {}".format(
+            compression, sorted(_VALID_COMPRESSIONS, key=str)))
 
 
 def _check_job_name(job_name):
   if job_name is None:
     return
-  if not isinstance(job_name, six.string_types):
+  if not isinstance(job_name, str):
     raise ValueError(
         "job_name must be a string, but job_name was of type "
         "{0}. job_name={1}".format(type(job_name), job_name))
@@ -76,6 +126,32 @@ def _check_job_name(job_name):
     raise ValueError("job_name must not be empty")
 
 
+@functools.lru_cache(maxsize=128)
+def _cached_eager_scalar(value, dtype, device_name):
+  del device_name  # Only used as part of the cache key.
+  return ops.convert_to_tensor(value, dtype=dtype)
+
+
+def _scalar_tensor(value, dtype, name):
+  """Converts a Python scalar argument to a tensor.
+
+  In eager mode the resulting constants are immutable, so tensors for commonly
+  repeated values (sentinels, processing modes, protocols) are reused across
+  dataset constructions instead of being re-created each time.
+
+  Args:
+    value: The value to convert. Only Python ints and strings are cached.
+    dtype: The dtype of the resulting tensor.
+    name: The name to give the tensor when it isn't cached.
+
+  Returns:
+    A scalar tensor holding `value`.
+  """
+  if context.executing_eagerly() and isinstance(value, (int, str)):
+    return _cached_eager_scalar(value, dtype, context.context().device_name)
+  return ops.convert_to_tensor(value, dtype=dtype, name=name)
+
+
 class _DataServiceDatasetV2(dataset_ops.DatasetSource):
   """A `Dataset` that reads elements from the tf.data service."""
 
@@ -91,7 +167,8 @@ class _DataServiceDatasetV2(dataset_ops.DatasetSource):
                num_consumers=None,
                max_outstanding_requests=None,
                task_refresh_interval_hint_ms=None,
-               target_workers="AUTO"):
+               target_workers="AUTO",
+               uncompress=False):
     """Constructs a _DataServiceDatasetV2.
 
     Args:
@@ -107,7 +184,8 @@ class _DataServiceDatasetV2(dataset_ops.DatasetSource):
         e.g. "grpc".
       data_transfer_protocol: (Optional.) The protocol to use for transferring
         data with the tf.data service. By default, data is transferred using
-        gRPC.
+        gRPC. `"grpc+stream"` transfers elements over one long-lived gRPC
+        stream per task instead of one call per element.
       job_name: (Optional.) The name of the job. If provided, it must be a
         non-empty string or Tensor. This argument makes it possible
         for multiple datasets to share the same job. The default behavior is
@@ -136,6 +214,10 @@ class _DataServiceDatasetV2(dataset_ops.DatasetSource):
         while users can specify other targets. For example, `"LOCAL"` helps
         avoid RPCs and data copy if every TF worker colocates with a tf.data
         service worker. Defaults to `"AUTO"`.
+      uncompress: (Optional.) Whether the dataset should uncompress the
+        elements it reads if they were compressed when the dataset was
+        registered. If `True`, `element_spec` is the spec of the uncompressed
+        elements. Defaults to `False`.
     """
     if consumer_index is None != num_consumers is None:
       raise ValueError(
@@ -145,8 +227,6 @@ class _DataServiceDatasetV2(dataset_ops.DatasetSource):
     if num_consumers is not None and job_name is None:
       raise ValueError("job_name must be set when setting num_consumers")
 
-    if job_name is None:
-      job_name = ""
     if max_outstanding_requests is None:
       max_outstanding_requests = dataset_ops.AUTOTUNE
     if task_refresh_interval_hint_ms is None:
@@ -154,23 +234,26 @@ class _DataServiceDatasetV2(dataset_ops.DatasetSource):
 
     self._dataset_id = ops.convert_to_tensor(
         dataset_id, dtype=dtypes.int64, name="dataset_id")
-    self._processing_mode = ops.convert_to_tensor(
+    self._processing_mode = _scalar_tensor(
         processing_mode, dtype=dtypes.string, name="processing_mode")
     self._address = ops.convert_to_tensor(
         address, dtype=dtypes.string, name="address")
-    self._protocol = ops.convert_to_tensor(
+    self._protocol = _scalar_tensor(
         protocol, dtype=dtypes.string, name="protocol")
-    self._job_name = ops.convert_to_tensor(
-        job_name, dtype=dtypes.string, name="job_name")
-    self._consumer_index = ops.convert_to_tensor(
+    if job_name is None:
+      self._job_name = _scalar_tensor("", dtype=dtypes.string, name="job_name")
+    else:
+      self._job_name = ops.convert_to_tensor(
+          job_name, dtype=dtypes.string, name="job_name")
+    self._consumer_index = _scalar_tensor(
         -1 if consumer_index is None else consumer_index,
         dtype=dtypes.int64,
         name="consumer_index")
-    self._num_consumers = ops.convert_to_tensor(
+    self._num_consumers = _scalar_tensor(
         -1 if num_consumers is None else num_consumers,
         dtype=dtypes.int64,
         name="num_consumers")
-    self._max_outstanding_requests = ops.convert_to_tensor(
+    self._max_outstanding_requests = _scalar_tensor(
         max_outstanding_requests,
         dtype=dtypes.int64,
         name="max_outstanding_requests")
@@ -182,6 +265,8 @@ class _DataServiceDatasetV2(dataset_ops.DatasetSource):
       compat_kwargs["data_transfer_protocol"] = data_transfer_protocol
     if compat.forward_compatible(2021, 7, 12) or target_workers != "AUTO":
       compat_kwargs["target_workers"] = target_workers
+    if uncompress:
+      compat_kwargs["uncompress"] = True
 
     variant_tensor = gen_experimental_dataset_ops.data_service_dataset_v2(
         dataset_id=self._dataset_id,
@@ -211,7 +296,7 @@ class _DataServiceDatasetV1(dataset_ops.DatasetV1Adapter):
   def __init__(self, dataset_id, processing_mode, address, element_spec,
                protocol, data_transfer_protocol, job_name, consumer_index,
                num_consumers, max_outstanding_requests,
-               task_refresh_interval_hint_ms, target_workers):
+               task_refresh_interval_hint_ms, target_workers, uncompress):
 
     self._wrapped = _DataServiceDatasetV2(
         dataset_id=dataset_id,
@@ -225,7 +310,8 @@ class _DataServiceDatasetV1(dataset_ops.DatasetV1Adapter):
         num_consumers=num_consumers,
         max_outstanding_requests=max_outstanding_requests,
         task_refresh_interval_hint_ms=task_refresh_interval_hint_ms,
-        target_workers=target_workers)
+        target_workers=target_workers,
+        uncompress=uncompress)
     super(_DataServiceDatasetV1, self).__init__(self._wrapped)
 
 
@@ -245,19 +331,24 @@ def _parse_service(service):
   Returns:
     The (protocol, address) tuple
   """
-  if not isinstance(service, six.string_types):
+  if not isinstance(service, str):
     raise ValueError(
         "service must be a string, but service was of type {0}. service={1}"
         .format(type(service), service))
+  return _parse_service_string(service)
+
+
+# Service strings are parsed each time a dataset is registered or read, and a
+# program typically only uses a handful of them.
+@functools.lru_cache(maxsize=32)
+def _parse_service_string(service):
   if not service:
     raise ValueError("service must not be empty")
-  parts = service.split("://")
-  if len(parts) == 2:
-    protocol, address = parts
-  elif len(parts) == 1:
-    address = parts[0]
+  protocol, sep, address = service.partition("://")
+  if not sep:
+    address = service
     protocol = _pywrap_utils.TF_DATA_DefaultProtocol()
-  else:
+  elif "://" in address:
     raise ValueError("malformed service string has multiple '://': %s" %
                      service)
   # TODO(aaudibert): Considering validating reachability of address here.
@@ -312,6 +403,8 @@ def _distribute(processing_mode,
       dispatcher for task changes.
     data_transfer_protocol: (Optional.) The protocol to use for transferring
       data with the tf.data service. By default, data is transferred using gRPC.
+      `"grpc+stream"` transfers elements over one long-lived gRPC stream per
+      task instead of one call per element.
     compression: How to compress the dataset's elements before transferring them
       over the network. "AUTO" leaves the decision of how to compress up to the
       tf.data service runtime. `None` indicates not to compress.
@@ -327,12 +420,13 @@ def _distribute(processing_mode,
     Dataset: A `Dataset` of the elements produced by the data service.
   """
   ProcessingMode.validate(processing_mode)
-  valid_compressions = [COMPRESSION_AUTO, COMPRESSION_NONE]
-  if compression not in valid_compressions:
-    raise ValueError(
-        "Invalid compression argument: {}. Must be one of {}".format(
-            compression, valid_compressions))
-  if compression == COMPRESSION_AUTO and data_transfer_protocol is not None:
+  _check_compression(compression)
+  if (compression == COMPRESSION_AUTO and data_transfer_protocol is not None and
+      data_transfer_protocol not in _GRPC_DATA_TRANSFER_PROTOCOLS):
+    compression = COMPRESSION_NONE
+  # Local workers hand elements to the reader in-process without serializing
+  # them, so compressing would only add an encode and decode per element.
+  if compression == COMPRESSION_AUTO and target_workers.upper() == "LOCAL":
     compression = COMPRESSION_NONE
   def _apply_fn(dataset):  # pylint: disable=missing-docstring
     dataset_id = _register_dataset(service, dataset, compression=compression)
@@ -566,6 +660,8 @@ def distribute(processing_mode,
       `max_outstanding_requests` of memory.
     data_transfer_protocol: (Optional.) The protocol to use for transferring
       data with the tf.data service. By default, data is transferred using gRPC.
+      `"grpc+stream"` transfers elements over one long-lived gRPC stream per
+      task instead of one call per element.
     compression: How to compress the dataset's elements before transferring them
       over the network. "AUTO" leaves the decision of how to compress up to the
       tf.data service runtime. `None` indicates not to compress.
@@ -613,15 +709,113 @@ def _register_dataset(service, dataset, compression):
   Returns:
     A scalar int64 tensor of the registered dataset's id.
   """
-  valid_compressions = [COMPRESSION_AUTO, COMPRESSION_NONE]
-  if compression not in valid_compressions:
+  if isinstance(service, tuple):
+    protocol, address = service
+  else:
+    protocol, address = _parse_service(service)
+  (dataset, external_state_policy, encoded_spec,
+   registered_compression) = _prepare_for_registration(dataset, compression)
+
+  compat_kwargs = {}
+  if registered_compression:
+    compat_kwargs["compression"] = registered_compression
+
+  dataset_id = gen_experimental_dataset_ops.register_dataset(
+      dataset._variant_tensor,  # pylint: disable=protected-access
+      address=address,
+      protocol=protocol,
+      external_state_policy=external_state_policy.value,
+      element_spec=encoded_spec,
+      **compat_kwargs)
+
+  return dataset_id
+
+
+def _register_datasets(service, datasets, compressions):
+  """Registers multiple datasets with the tf.data service in a single request.
+
+  This is equivalent to calling `_register_dataset` for each dataset, but only
+  makes one round trip to the dispatcher, which helps when registering many
+  datasets, e.g. one per shard or replica.
+
+  The dispatcher registers the datasets one at a time, so if the request fails
+  partway, some of the datasets may already be registered. Retrying is safe:
+  registering a dataset which is already registered returns its existing id.
+
+  Args:
+    service: A string or a tuple indicating how to connect to the tf.data
+      service, as in `_register_dataset`.
+    datasets: A non-empty list of `tf.data.Dataset`s to register with the
+      tf.data service.
+    compressions: A list with one compression per dataset, each as in
+      `_register_dataset`. "AUTO" leaves the decision of how to compress up to
+      the tf.data service runtime. `None` indicates not to compress.
+
+  Returns:
+    An int64 vector tensor with the id of each registered dataset.
+  """
+  if not datasets:
+    raise ValueError("datasets must not be empty")
+  if len(compressions) != len(datasets):
     raise ValueError(
-        "Invalid compression argument: {}. Must be one of {}".format(
-            compression, valid_compressions))
+        "compressions must have one entry per dataset, but got {0} "
+        "compressions for {1} datasets".format(
+            len(compressions), len(datasets)))
   if isinstance(service, tuple):
     protocol, address = service
   else:
     protocol, address = _parse_service(service)
+  variant_tensors = []
+  external_state_policies = []
+  encoded_specs = []
+  registered_compressions = []
+  for dataset, compression in zip(datasets, compressions):
+    (dataset, external_state_policy, encoded_spec,
+     registered_compression) = _prepare_for_registration(dataset, compression)
+    variant_tensors.append(
+        dataset._variant_tensor)  # pylint: disable=protected-access
+    external_state_policies.append(external_state_policy.value)
+    encoded_specs.append(encoded_spec)
+    registered_compressions.append(registered_compression)
+
+  compat_kwargs = {}
+  if any(registered_compressions):
+    compat_kwargs["compressions"] = registered_compressions
+
+  return gen_experimental_dataset_ops.register_datasets(
+      variant_tensors,
+      address=address,
+      protocol=protocol,
+      external_state_policies=external_state_policies,
+      element_specs=encoded_specs,
+      **compat_kwargs)
+
+
+def _prepare_for_registration(dataset, compression):
+  """Applies the transformations to run on the workers before registration.
+
+  Args:
+    dataset: A `tf.data.Dataset` to register with the tf.data service.
+    compression: How to compress the dataset's elements.
+
+  Returns:
+    A (dataset, external_state_policy, encoded_spec, registered_compression)
+    tuple, where `dataset` is the dataset to register, `encoded_spec` is the
+    serialized element spec, or "" when it is not available, and
+    `registered_compression` is the compression to record with the dispatcher,
+    or "" when it is not recorded.
+  """
+  _check_compression(compression)
+  # Readers past this horizon look up the recorded compression, so only then
+  # may "AUTO" leave small elements uncompressed. Older readers uncompress
+  # whenever their compression is "AUTO".
+  registered_compression = ""
+  if compat.forward_compatible(2021, 8, 5):
+    if (compression == COMPRESSION_AUTO and
+        not _should_compress(dataset.element_spec)):
+      compression = COMPRESSION_NONE
+    registered_compression = ("SNAPPY" if compression == COMPRESSION_AUTO else
+                              "NONE")
   external_state_policy = dataset.options().experimental_external_state_policy
   if external_state_policy is None:
     external_state_policy = ExternalStatePolicy.WARN
@@ -638,15 +832,7 @@ def _register_dataset(service, dataset, compression):
         num_parallel_calls=dataset_ops.AUTOTUNE)
   dataset = dataset.prefetch(dataset_ops.AUTOTUNE)
   dataset = dataset._apply_debug_options()  # pylint: disable=protected-access
-
-  dataset_id = gen_experimental_dataset_ops.register_dataset(
-      dataset._variant_tensor,  # pylint: disable=protected-access
-      address=address,
-      protocol=protocol,
-      external_state_policy=external_state_policy.value,
-      element_spec=encoded_spec)
-
-  return dataset_id
+  return dataset, external_state_policy, encoded_spec, registered_compression
 
 
 @tf_export("data.experimental.service.register_dataset")
@@ -751,6 +937,8 @@ def _from_dataset_id(processing_mode,
       dispatcher for task changes.
     data_transfer_protocol: (Optional.) The protocol to use for transferring
       data with the tf.data service. By default, data is transferred using gRPC.
+      `"grpc+stream"` transfers elements over one long-lived gRPC stream per
+      task instead of one call per element.
     compression: An indication of how the dataset's elements were compressed, so
       that `from_dataset_id` can uncompress them if necessary.
     target_workers: (Optional.) Which workers to read from. If `"AUTO"`, tf.data
@@ -765,19 +953,14 @@ def _from_dataset_id(processing_mode,
     A `tf.data.Dataset` which reads from the tf.data service.
   """
   ProcessingMode.validate(processing_mode)
-  valid_compressions = [COMPRESSION_AUTO, COMPRESSION_NONE]
   if isinstance(service, tuple):
     protocol, address = service
   else:
     protocol, address = _parse_service(service)
 
-  if compression not in valid_compressions:
-    raise ValueError(
-        "Invalid compression argument: {}. Must be one of {}".format(
-            compression, valid_compressions))
+  _check_compression(compression)
   if job_name is not None:
-    if not isinstance(job_name, six.string_types) and not isinstance(
-        job_name, ops.Tensor):
+    if not isinstance(job_name, (str, ops.Tensor)):
       raise ValueError(
           "job_name must be a string or Tensor, but job_name was of type "
           "{0}. job_name={1}".format(type(job_name), job_name))
@@ -811,9 +994,15 @@ def _from_dataset_id(processing_mode,
     element_spec = coder.decode_proto(struct_pb)
 
   # If we compress, the data service side dataset will produce scalar variants.
+  # These are uncompressed by the data service dataset itself when supported,
+  # and by a separate map otherwise. The data service dataset looks up the
+  # compression recorded when the dataset was registered, since "AUTO" may
+  # have left the elements uncompressed.
+  uncompress = (
+      compression == COMPRESSION_AUTO and compat.forward_compatible(2021, 8, 5))
+  uncompress_with_map = compression == COMPRESSION_AUTO and not uncompress
   data_service_element_spec = (
-      tensor_spec.TensorSpec(shape=(), dtype=dtypes.variant)
-      if compression == COMPRESSION_AUTO else element_spec)
+      _SCALAR_VARIANT_SPEC if uncompress_with_map else element_spec)
 
   dataset = _DataServiceDataset(
       dataset_id=dataset_id,
@@ -827,17 +1016,16 @@ def _from_dataset_id(processing_mode,
       num_consumers=num_consumers,
       max_outstanding_requests=max_outstanding_requests,
       task_refresh_interval_hint_ms=task_refresh_interval_hint_ms,
-      target_workers=target_workers)
-  if compression == COMPRESSION_AUTO:
+      target_workers=target_workers,
+      uncompress=uncompress)
+  if uncompress_with_map:
     dataset = dataset.map(
         lambda x: compression_ops.uncompress(x, output_spec=element_spec),
         num_parallel_calls=dataset_ops.AUTOTUNE)
 
   # Disable autosharding for shared jobs.
   if job_name is not None:
-    options = dataset_ops.Options()
-    options.experimental_distribute.auto_shard_policy = AutoShardPolicy.OFF
-    dataset = dataset.with_options(options)
+    dataset = dataset.with_options(_SHARED_JOB_OPTIONS)
   return dataset
 
 
@@ -930,6 +1118,8 @@ def from_dataset_id(processing_mode,
       `max_outstanding_requests` of memory.
     data_transfer_protocol: (Optional.) The protocol to use for transferring
       data with the tf.data service. By default, data is transferred using gRPC.
+      `"grpc+stream"` transfers elements over one long-lived gRPC stream per
+      task instead of one call per element.
     target_workers: (Optional.) Which workers to read from. If `"AUTO"`, tf.data
       runtime decides which workers to read from. If `"ANY"`, reads from any
       tf.data service workers. If `"LOCAL"`, only reads from local in-processs
@@ -943,8 +1133,12 @@ def from_dataset_id(processing_mode,
   """
   _check_job_name(job_name)
   if job_name is not None:
-    job_name = string_ops.string_join(
-        ["dataset_id=", string_ops.as_string(dataset_id), job_name], "/")
+    if isinstance(dataset_id, (int, ops.EagerTensor)):
+      # The id is already known, so there is no need for string ops.
+      job_name = "dataset_id={}/{}".format(int(dataset_id), job_name)
+    else:
+      job_name = string_ops.string_join(
+          ["dataset_id=", string_ops.as_string(dataset_id), job_name], "/")
 
   return _from_dataset_id(
       processing_mode=processing_mode,